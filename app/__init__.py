@@ -15,15 +15,34 @@ def create_app():
     login_manager.init_app(app)
     migrate.init_app(app, db)
 
-    from .routes import auth, main, data, schema
+    from .models.audit import audit_log
+    audit_log.init_app(app)
+
+    from .models.user_cache import init_user_cache, load_user as load_cached_user
+    init_user_cache(app)
+
+    from .models.core_lookup import init_core_lookup
+    init_core_lookup(app)
+
+    from .models.core_cache import init_core_cache
+    init_core_cache(app)
+
+    from .models.query_cache import init_query_cache
+    init_query_cache(app)
+
+    from .models.core_records import init_core_records
+    init_core_records(app)
+
+    from .routes import auth, main, data, schema, audit, search
     app.register_blueprint(auth.bp)
     app.register_blueprint(main.bp)
     app.register_blueprint(data.bp)
     app.register_blueprint(schema.bp)
+    app.register_blueprint(audit.bp)
+    app.register_blueprint(search.bp)
 
     @login_manager.user_loader
     def load_user(user_id):
-        from .models.user import User
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
 
     return app
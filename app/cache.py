@@ -0,0 +1,138 @@
+# File: app/cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+# Session.info key -> (callback, on_rollback) for on_commit.
+_deferred = {}
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded LRU cache with an optional time-to-live.
+    Counts hits, misses and evictions so callers can expose them as metrics.
+
+    maxsize bounds the number of entries. With weigh (value -> int) and
+    maxweight, the summed weight of the entries is bounded as well, and a
+    value heavier than maxweight on its own is not stored at all.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, maxweight=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.weight = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires, _ = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        weight = self.weigh(value) if self.weigh is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.maxweight is not None and weight > self.maxweight:
+                return
+            self._data[key] = (value, expires, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.weight -= evicted
+                self.evictions += 1
+
+    def _remove(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.weight -= item[2]
+
+    def get_or_set(self, key, loader):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+            if self.maxweight is not None:
+                stats.update(weight=self.weight, maxweight=self.maxweight)
+            return stats
+
+
+def on_commit(session, key, items, callback, on_rollback=None):
+    """
+    Collects items in session.info[key] until the session's transaction
+    ends. On commit callback receives everything collected under key; on
+    rollback on_rollback does, or the items are dropped. Work that must only
+    happen once the data is visible to other connections, like cache
+    invalidation, is deferred this way instead of running at flush time.
+    """
+    # A transaction always ends, so collected items never leak into the next.
+    if not session.in_transaction():
+        session.begin()
+    _deferred[key] = (callback, on_rollback)
+    session.info.setdefault(key, []).extend(items)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_committed(session):
+    for key, (callback, _) in list(_deferred.items()):
+        items = session.info.pop(key, None)
+        if items:
+            callback(items)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _run_rolled_back(session, transaction):
+    # Also runs after a commit, by when _run_committed has taken the items.
+    if transaction.parent is not None:
+        return
+    for key, (_, on_rollback) in list(_deferred.items()):
+        items = session.info.pop(key, None)
+        if items and on_rollback is not None:
+            on_rollback(items)
@@ -0,0 +1,47 @@
+# File: app/conditional.py
+
+import hashlib
+from flask import request, session, make_response
+from flask_login import current_user
+
+
+def make_etag(*parts, per_user=True):
+    """
+    A strong ETag over parts (change generations plus whatever else selects
+    the representation). Pages render per-user controls, so the current
+    user is included unless per_user is False.
+    """
+    if per_user:
+        parts += (current_user.get_id(),)
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Returns a 304 response when the request's validators match etag (or,
+    without If-None-Match, last_modified), else None. Pending flash
+    messages are rendered by the next full page, so such requests always
+    get one, as do responses without an etag, which cannot be versioned.
+    """
+    if etag is None or session.get('_flashes'):
+        return None
+    if request.if_none_match:
+        matched = request.if_none_match.contains(etag)
+    else:
+        matched = (last_modified is not None and request.if_modified_since is not None
+                   and last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))
+    if not matched:
+        return None
+    return set_validators(make_response('', 304), etag, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    response = make_response(response)
+    if etag is not None:
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+    # Browsers may keep the page but must revalidate it; shared caches must
+    # not store per-user pages at all.
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,242 @@
+# File: app/models/audit.py
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert, select, delete
+from app import db
+from app.cache import on_commit
+from .log import Log, LogArchive
+
+
+class AuditLogWriter:
+    """
+    Writes Log rows for data mutations.
+
+    In the default 'transactional' mode records are added to the caller's
+    session, so they commit (or roll back) together with the data change.
+    In 'buffered' mode records wait on the caller's session until it
+    commits (a rollback discards them), then are queued in memory and
+    written in batches by a background thread once AUDIT_LOG_BATCH_SIZE
+    records are waiting or AUDIT_LOG_FLUSH_INTERVAL seconds have passed.
+    A failed write keeps the batch queued and is retried. Pending records are flushed
+    at shutdown; if the database is unreachable they are spooled to
+    AUDIT_LOG_SPOOL_PATH and replayed on the next start.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = 'transactional'
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('AUDIT_LOG_MODE', 'transactional')
+        self.batch_size = app.config.get('AUDIT_LOG_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('AUDIT_LOG_FLUSH_INTERVAL', 2.0)
+        self.spool_path = app.config.get('AUDIT_LOG_SPOOL_PATH', os.path.join(app.instance_path, 'audit_spool.jsonl'))
+        app.extensions['audit_log'] = self
+
+        if self.mode == 'buffered' and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def record(self, user_id, action, table_name, entry_id, reason):
+        self.record_many([{'user_id': user_id, 'action': action, 'table_name': table_name,
+                           'entry_id': entry_id, 'reason': reason}])
+
+    def record_many(self, records):
+        """
+        Records a list of dicts with user_id, action, table_name, entry_id and
+        reason keys. In transactional mode the caller must commit.
+        """
+        if not records:
+            return
+        now = datetime.utcnow()
+        for record in records:
+            record.setdefault('timestamp', now)
+
+        if self.mode != 'buffered':
+            db.session.execute(insert(Log), records)
+            return
+
+        # Held on the session until its transaction commits; a rollback
+        # discards them.
+        on_commit(db.session(), 'audit_log_pending', records, self.enqueue)
+
+    def enqueue(self, records):
+        with self._lock:
+            self._buffer.extend(records)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Writes all buffered records in one executemany INSERT on a separate
+        connection, so it never interferes with a request's transaction.
+        """
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return 0
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(insert(Log), records)
+            self.flushes += 1
+            return len(records)
+        except Exception as e:
+            logging.error(f"Audit log flush failed, re-queueing {len(records)} records: {str(e)}")
+            with self._lock:
+                self._buffer[:0] = records
+            raise
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def replay_spool(self):
+        if not os.path.exists(self.spool_path):
+            return 0
+        with open(self.spool_path) as spool:
+            records = [json.loads(line) for line in spool if line.strip()]
+        for record in records:
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+        with self._lock:
+            self._buffer[:0] = records
+        # The buffer owns the records now; a failed flush re-queues them and
+        # shutdown spools them again.
+        os.remove(self.spool_path)
+        self.flush()
+        logging.info(f"Replayed {len(records)} spooled audit log records")
+        return len(records)
+
+    def shutdown(self):
+        try:
+            self.flush()
+        except Exception:
+            self._spool()
+
+    def _spool(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+        with open(self.spool_path, 'a') as spool:
+            for record in records:
+                spool.write(json.dumps(record, default=lambda value: value.isoformat()) + '\n')
+        logging.warning(f"Spooled {len(records)} audit log records to {self.spool_path}")
+
+    def _run(self):
+        try:
+            self.replay_spool()
+        except Exception as e:
+            logging.error(f"Could not replay audit log spool: {str(e)}")
+
+        last_flush = time.monotonic()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self.pending() >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                try:
+                    self.flush()
+                except Exception as e:
+                    # flush() put the batch back at the head of the buffer.
+                    logging.warning(f"Audit log flush will be retried in {self.flush_interval}s: {str(e)}")
+                last_flush = time.monotonic()
+
+
+audit_log = AuditLogWriter()
+
+def query_logs(table_name=None, entry_id=None, user_id=None, since=None, until=None,
+               before_id=None, limit=50, tables=None):
+    """
+    Returns (logs, next_before_id) for the newest Log rows matching the
+    filters. Pages are keyed on id, so pass next_before_id back as before_id
+    to fetch the next page. tables, when given, restricts results to those
+    table names.
+    """
+    query = Log.query
+    if table_name is not None:
+        query = query.filter(Log.table_name == table_name)
+    if entry_id is not None:
+        query = query.filter(Log.entry_id == entry_id)
+    if user_id is not None:
+        query = query.filter(Log.user_id == user_id)
+    if since is not None:
+        query = query.filter(Log.timestamp >= since)
+    if until is not None:
+        query = query.filter(Log.timestamp < until)
+    if before_id is not None:
+        query = query.filter(Log.id < before_id)
+    if tables is not None:
+        query = query.filter(Log.table_name.in_(tables))
+
+    logs = query.order_by(Log.id.desc()).limit(limit + 1).all()
+    if len(logs) > limit:
+        return logs[:limit], logs[limit - 1].id
+    return logs, None
+
+
+def archive_logs(cutoff, batch_size=5000):
+    """
+    Moves Log rows older than cutoff into gzip-compressed LogArchive
+    partitions, one partition per month per batch. Each batch is written and
+    deleted in a single transaction. Returns the number of rows archived.
+    """
+    log_table = Log.__table__
+    archived = 0
+    while True:
+        rows = db.session.execute(
+            select(log_table).where(log_table.c.timestamp < cutoff)
+            .order_by(log_table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        partitions = {}
+        for row in rows:
+            record = dict(row)
+            record['timestamp'] = record['timestamp'].isoformat()
+            partitions.setdefault(record['timestamp'][:7], []).append(record)
+
+        for period, records in partitions.items():
+            payload = '\n'.join(json.dumps(record) for record in records)
+            db.session.add(LogArchive(
+                period=period,
+                first_log_id=records[0]['id'],
+                last_log_id=records[-1]['id'],
+                row_count=len(records),
+                data=gzip.compress(payload.encode('utf-8'))
+            ))
+
+        # Every row up to the last id that matches the cutoff is in this batch.
+        db.session.execute(delete(log_table).where(
+            log_table.c.id <= rows[-1]['id'], log_table.c.timestamp < cutoff
+        ))
+        db.session.commit()
+        archived += len(rows)
+        logging.info(f"Archived {archived} log rows older than {cutoff.isoformat()}")
+    return archived
+
+
+def read_archive(archive):
+    """
+    Returns the Log records stored in a LogArchive partition as dicts.
+    """
+    payload = gzip.decompress(archive.data).decode('utf-8')
+    return [json.loads(line) for line in payload.splitlines() if line]
@@ -0,0 +1,157 @@
+# File: app/models/column_types.py
+
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import String, Integer, Float, Numeric, Boolean, Date, DateTime, JSON
+
+TRUE_VALUES = {'true', 't', 'yes', 'y', 'on', '1'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', 'off', '0'}
+
+
+def _to_integer(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return int(value)
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return float(value)
+
+
+def _to_decimal(value):
+    if isinstance(value, bool):
+        raise ValueError(value)
+    try:
+        return Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(value)
+
+
+def _to_boolean(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _to_datetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _to_json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+COERCERS = {
+    'string': str,
+    'integer': _to_integer,
+    'float': _to_float,
+    'decimal': _to_decimal,
+    'boolean': _to_boolean,
+    'date': _to_date,
+    'datetime': _to_datetime,
+    'json': _to_json
+}
+
+SQL_TYPES = {
+    'string': lambda: String(255),
+    'integer': Integer,
+    'float': Float,
+    'decimal': lambda: Numeric(18, 6),
+    'boolean': Boolean,
+    'date': Date,
+    'datetime': DateTime,
+    'json': JSON
+}
+
+# Types with no meaningful ordering; they can't be sorted or range-filtered.
+UNORDERED_TYPES = {'json'}
+
+PYTHON_TYPE_NAMES = {
+    str: 'string',
+    int: 'integer',
+    float: 'float',
+    Decimal: 'decimal',
+    bool: 'boolean',
+    date: 'date',
+    datetime: 'datetime',
+    dict: 'json'
+}
+
+
+def sql_type(type_name):
+    """Returns the SQLAlchemy type for a dynamic-table column type, or None."""
+    factory = SQL_TYPES.get(type_name)
+    return factory() if factory is not None else None
+
+
+def column_type_name(Table, column_name):
+    """
+    Returns the declared type of a dynamic-table column. Columns that are not
+    part of DynamicTable.schema (id, timestamps, core_uuid) fall back to the
+    reflected SQL type.
+    """
+    schema = Table.info.get('dynamic_table', {}).get('schema', {})
+    if column_name in schema:
+        return schema[column_name]
+    try:
+        return PYTHON_TYPE_NAMES.get(Table.c[column_name].type.python_type, 'string')
+    except NotImplementedError:
+        return 'string'
+
+
+def coerce_row(Table, values):
+    """
+    Coerces a {column: raw value} dict against Table's column types. Raises
+    ValueError naming the first column whose value does not fit.
+    """
+    row = {}
+    for name, value in values.items():
+        try:
+            row[name] = coerce_value(column_type_name(Table, name), value)
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}")
+    return row
+
+
+def format_value(type_name, value):
+    """
+    Renders a column value for display or an edit form, in a form that
+    coerce_value() accepts back.
+    """
+    if value is None:
+        return ''
+    if type_name == 'json':
+        return json.dumps(value)
+    if type_name == 'boolean':
+        return 'true' if value else 'false'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def coerce_value(type_name, value):
+    """
+    Converts a raw form or CSV value to the Python type of the column.
+    Empty strings become None. Raises ValueError if the value does not fit.
+    """
+    if value is None or value == '':
+        return None
+    coercer = COERCERS.get(type_name, str)
+    try:
+        return coercer(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' is not a valid {type_name}")
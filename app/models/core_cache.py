@@ -0,0 +1,71 @@
+# File: app/models/core_cache.py
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from app.cache import LRUCache, on_commit
+from .core_table import CoreTable
+from .table_writes import ID_CHUNK_SIZE
+
+# CoreTable.to_dict() payloads keyed by uuid. Entries are dropped whenever
+# this process commits a change to the row; the TTL bounds how long another
+# worker's change can go unnoticed.
+core_cache = LRUCache(maxsize=4096, ttl=300)
+
+
+def init_core_cache(app):
+    core_cache.maxsize = app.config.get('CORE_CACHE_SIZE', 4096)
+    core_cache.ttl = app.config.get('CORE_CACHE_TTL', 300)
+
+
+def get_many(uuids):
+    """
+    Returns {uuid: core dict} for the uuids that exist. Cached entries are
+    served from memory and all misses are loaded with one IN query per
+    ID_CHUNK_SIZE uuids. The dicts are copies, so callers may modify them.
+    """
+    found = {}
+    misses = []
+    for uuid in dict.fromkeys(uuids):
+        if uuid is None:
+            continue
+        cached = core_cache.get(uuid)
+        if cached is None:
+            misses.append(uuid)
+        else:
+            found[uuid] = dict(cached)
+
+    for start in range(0, len(misses), ID_CHUNK_SIZE):
+        chunk = misses[start:start + ID_CHUNK_SIZE]
+        for core in CoreTable.query.filter(CoreTable.uuid.in_(chunk)).all():
+            payload = core.to_dict()
+            core_cache.set(core.uuid, payload)
+            found[core.uuid] = dict(payload)
+    return found
+
+
+def get_core(uuid):
+    """Returns the core dict for uuid, or None."""
+    return get_many([uuid]).get(uuid)
+
+
+def invalidate_core(uuid=None):
+    if uuid is None:
+        core_cache.clear()
+    else:
+        core_cache.delete(uuid)
+
+
+@event.listens_for(CoreTable, 'after_insert')
+@event.listens_for(CoreTable, 'after_update')
+@event.listens_for(CoreTable, 'after_delete')
+def _collect_changed_core(mapper, connection, target):
+    # A changed uuid leaves the old key behind otherwise.
+    uuids = [target.uuid] + list(inspect(target).attrs.uuid.history.deleted)
+    # The flushed state may have been cached before a rollback, so that
+    # invalidates too.
+    on_commit(object_session(target), 'core_cache_changed', uuids, _invalidate_many, _invalidate_many)
+
+
+def _invalidate_many(uuids):
+    for uuid in set(uuids):
+        invalidate_core(uuid)
@@ -0,0 +1,55 @@
+# File: app/models/core_lookup.py
+
+from sqlalchemy import event, select, func
+from app import db
+from app.cache import LRUCache
+from .core_table import CoreTable
+from .search import CORE_TABLE, search_table
+
+LOOKUP_COLUMNS = ['id', 'uuid', 'name', 'description']
+
+# Results for recently typed prefixes, keyed by (normalised query, limit).
+# Any core write in this process clears it; the TTL bounds staleness from
+# other workers.
+lookup_cache = LRUCache(maxsize=512, ttl=60)
+
+
+def init_core_lookup(app):
+    lookup_cache.maxsize = app.config.get('CORE_LOOKUP_CACHE_SIZE', 512)
+    lookup_cache.ttl = app.config.get('CORE_LOOKUP_CACHE_TTL', 60)
+
+
+def lookup_core_entries(query, limit):
+    """
+    Returns up to limit core entries for a typeahead: names starting with
+    query first (a range scan on the lower(name) index), then entries whose
+    name or description contains the words (the full-text index).
+    """
+    query = ' '.join(query.split()).lower()
+    return lookup_cache.get_or_set((query, limit), lambda: _lookup(query, limit))
+
+
+def _lookup(query, limit):
+    table = CoreTable.__table__
+    lowered = func.lower(table.c.name)
+    stmt = select(*[table.c[name] for name in LOOKUP_COLUMNS]).order_by(lowered, table.c.id).limit(limit)
+    if query:
+        # Equivalent to LIKE 'query%' but served by the expression index on
+        # every backend.
+        stmt = stmt.where(lowered >= query, lowered < query + '\U0010ffff')
+    entries = [dict(row) for row in db.session.execute(stmt).mappings()]
+
+    if query and len(entries) < limit:
+        seen = {entry['id'] for entry in entries}
+        matches, _ = search_table(CORE_TABLE, query, limit=limit)
+        for match in matches:
+            if match['id'] not in seen and len(entries) < limit:
+                entries.append({name: match[name] for name in LOOKUP_COLUMNS})
+    return entries
+
+
+@event.listens_for(CoreTable, 'after_insert')
+@event.listens_for(CoreTable, 'after_update')
+@event.listens_for(CoreTable, 'after_delete')
+def _clear_lookup_cache(mapper, connection, target):
+    lookup_cache.clear()
@@ -0,0 +1,95 @@
+# File: app/models/core_records.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+from app import db
+from .core_cache import get_many
+from .dynamic_table import DynamicTable
+from .dynamic_tables import get_table_class
+from .statement_cache import statement_cache, UUIDS_PARAM
+from .table_writes import ID_CHUNK_SIZE
+
+# Shared by every request; created by init_core_records when
+# CORE_FETCH_WORKERS allows more than one worker.
+_executor = None
+
+
+def dependent_tables(allowed_tables=None):
+    """
+    Names of the dynamic tables linked to the core table, optionally limited
+    to allowed_tables.
+    """
+    names = db.session.execute(
+        select(DynamicTable.table_name).where(DynamicTable.is_independent.isnot(True))
+        .order_by(DynamicTable.table_name)
+    ).scalars().all()
+    if allowed_tables is not None:
+        names = [name for name in names if name in allowed_tables]
+    return names
+
+
+def _fetch_table(connection, Table, uuids):
+    """
+    Returns {core uuid: [row dicts]} for the rows of Table that reference
+    any of uuids, using the core_uuid index in bounded IN batches.
+    """
+    stmt = statement_cache.get(Table, 'select_by_core_uuids')
+    grouped = {}
+    for start in range(0, len(uuids), ID_CHUNK_SIZE):
+        chunk = uuids[start:start + ID_CHUNK_SIZE]
+        for row in connection.execute(stmt, {UUIDS_PARAM: chunk}).mappings():
+            grouped.setdefault(row['core_uuid'], []).append(dict(row))
+    return grouped
+
+
+def init_core_records(app):
+    global _executor
+    workers = app.config.get('CORE_FETCH_WORKERS', 1)
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='core-fetch') if workers > 1 else None
+
+
+def fetch_core_records(uuids, table_names, concurrent=True):
+    """
+    Resolves core uuids against every table in table_names in one pass.
+
+    Returns {'cores': [...], 'missing': [...]}: one entry per core record
+    found, in the order requested, holding its CoreTable fields and a
+    'tables' dict of table name -> rows, plus the uuids with no core record.
+
+    The tables are read through the session, in the request's transaction.
+    When CORE_FETCH_WORKERS is above 1 and concurrent is set, they are
+    instead queried in parallel on the shared worker pool, each on its own
+    connection; the result is then not a consistent snapshot, since every
+    table is read in a separate transaction. SQLite serialises the reads
+    anyway, so it always uses the session.
+    """
+    uuids = list(dict.fromkeys(uuids))
+    cores = get_many(uuids)
+    found = [uuid for uuid in uuids if uuid in cores]
+
+    # Reflection goes through the registry on this thread; workers only run
+    # the cached statements.
+    tables = [Table for Table in (get_table_class(name) for name in table_names)
+              if Table is not None and 'core_uuid' in Table.c]
+    engine = db.engine
+
+    def fetch(Table):
+        with engine.connect() as connection:
+            return Table.name, _fetch_table(connection, Table, found)
+
+    if not (found and tables):
+        results = []
+    elif concurrent and _executor is not None and len(tables) > 1 and engine.dialect.name != 'sqlite':
+        results = list(_executor.map(fetch, tables))
+    else:
+        connection = db.session.connection()
+        results = [(Table.name, _fetch_table(connection, Table, found)) for Table in tables]
+
+    for uuid in found:
+        cores[uuid]['tables'] = {name: grouped.get(uuid, []) for name, grouped in results}
+    logging.info(f"Fetched {len(found)} core records across {len(tables)} tables")
+    return {
+        'cores': [cores[uuid] for uuid in found],
+        'missing': [uuid for uuid in uuids if uuid not in cores]
+    }
@@ -12,6 +12,11 @@ class CoreTable(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    __table_args__ = (
+        # Serves case-insensitive prefix lookups from the core entry picker.
+        db.Index('ix_core_table_name_lower', db.func.lower(name)),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
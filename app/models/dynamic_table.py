@@ -9,6 +9,7 @@ class DynamicTable(db.Model):
     schema = db.Column(JSON, nullable=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     is_independent = db.Column(db.Boolean, default=False)
+    indexes = db.Column(JSON, default=list)  # [{'name', 'columns', 'unique'}]
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
@@ -5,8 +5,22 @@ from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table
 from datetime import datetime
 import logging
 from .dynamic_table import DynamicTable
+from .table_registry import table_registry
+from .statement_cache import statement_cache
+from .user import User
+from .permissions import invalidate_permissions
+from .table_statistics import TableStatistics
+from .table_relationship import link_table_edges
+from .column_types import sql_type
+from .table_indexes import default_indexes, normalize_index, build_index
+from .search import create_search_index
 
-def create_dynamic_table(table_name, columns, owner_id, is_independent=False):
+def create_dynamic_table(table_name, columns, owner_id, is_independent=False, indexes=None):
+    """
+    Creates a dynamic table. indexes lists extra index specs (column lists or
+    {'columns': [...], 'unique': bool} dicts); core-dependent tables always
+    get an index on core_uuid. Raises ValueError on an invalid index spec.
+    """
     logging.info(f"Creating dynamic table: {table_name}")
 
     existing_table = DynamicTable.query.filter_by(table_name=table_name).first()
@@ -14,16 +28,41 @@ def create_dynamic_table(table_name, columns, owner_id, is_independent=False):
         logging.info(f"Table {table_name} already exists")
         return existing_table
 
+    column_names = ['id', 'created_at', 'updated_at'] + ([] if is_independent else ['core_uuid']) + list(columns)
+    index_definitions = default_indexes(table_name, is_independent)
+    for spec in indexes or []:
+        index_definitions.append(normalize_index(table_name, column_names, spec, index_definitions))
+
     new_dynamic_table = DynamicTable(
         table_name=table_name,
         schema=columns,
         owner_id=owner_id,
-        is_independent=is_independent
+        is_independent=is_independent,
+        indexes=index_definitions
     )
     db.session.add(new_dynamic_table)
+    db.session.add(TableStatistics(table_name=table_name, row_count=0, avg_row_bytes=0))
+    owner = db.session.get(User, owner_id)
+    if owner:
+        invalidate_permissions(owner)
+    db.session.flush()
+    link_table_edges(new_dynamic_table)
     db.session.commit()
 
     metadata = db.metadata
+    table = build_table(table_name, metadata, columns, is_independent, index_definitions)
+    table.create(db.engine)
+    invalidate_table(table_name, drop_metadata=False)
+    create_search_index(table_name)
+    logging.info(f"Dynamic table {table_name} created successfully")
+    return new_dynamic_table
+
+def build_table(table_name, metadata, columns, is_independent, indexes=()):
+    """
+    Returns the Table definition for a dynamic table with the given
+    {column name: type name} schema and index definitions, without creating
+    it.
+    """
     table_columns = [
         Column('id', Integer, primary_key=True),
         Column('created_at', DateTime, default=datetime.utcnow),
@@ -34,26 +73,57 @@ def create_dynamic_table(table_name, columns, owner_id, is_independent=False):
         table_columns.append(Column('core_uuid', String(36), ForeignKey('core_table.uuid'), nullable=False))
 
     for column_name, column_type in columns.items():
-        if column_type == 'string':
-            table_columns.append(Column(column_name, String(255)))
-        elif column_type == 'integer':
-            table_columns.append(Column(column_name, Integer))
-        logging.info(f"Added column {column_name} of type {column_type} to {table_name}")
+        column_sql_type = sql_type(column_type)
+        if column_sql_type is None:
+            logging.warning(f"Skipping column {column_name} of unknown type {column_type} in {table_name}")
+            continue
+        table_columns.append(Column(column_name, column_sql_type))
 
     table = Table(table_name, metadata, *table_columns)
-    table.create(db.engine)
-    logging.info(f"Dynamic table {table_name} created successfully")
-    return new_dynamic_table
+    for definition in indexes:
+        build_index(table, definition)
+    return table
 
-def get_table_class(table_name):
-    logging.info(f"Attempting to get table class for: {table_name}")
+def _reflect_table(table_name):
     dynamic_table = DynamicTable.query.filter_by(table_name=table_name).first()
     if not dynamic_table:
         logging.info(f"Table {table_name} not found")
         return None
 
     metadata = db.metadata
-    return Table(table_name, metadata, autoload_with=db.engine)
+    table = Table(table_name, metadata, autoload_with=db.engine)
+    # Snapshot the catalog row so routes don't need a second lookup.
+    table.info['dynamic_table'] = {
+        'id': dynamic_table.id,
+        'table_name': dynamic_table.table_name,
+        'schema': dynamic_table.schema or {},
+        'owner_id': dynamic_table.owner_id,
+        'is_independent': bool(dynamic_table.is_independent),
+        'indexes': dynamic_table.indexes or []
+    }
+    return table
+
+def get_table_class(table_name):
+    logging.debug(f"Attempting to get table class for: {table_name}")
+    return table_registry.get(table_name, lambda: _reflect_table(table_name))
+
+def get_table_info(table_name):
+    table = get_table_class(table_name)
+    return table.info['dynamic_table'] if table is not None else None
+
+def invalidate_table(table_name=None, drop_metadata=True):
+    """
+    Must be called after any DDL against a dynamic table so the next
+    get_table_class() call reflects the new definition.
+    """
+    if drop_metadata:
+        metadata = db.metadata
+        names = [table_name] if table_name else get_all_dynamic_tables()
+        for name in names:
+            if name in metadata.tables:
+                metadata.remove(metadata.tables[name])
+    table_registry.invalidate(table_name)
+    statement_cache.invalidate(table_name)
 
 def get_all_dynamic_tables():
     return [table.table_name for table in DynamicTable.query.all()]
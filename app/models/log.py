@@ -14,5 +14,41 @@ class Log(db.Model):
 
     user = db.relationship('User', backref=db.backref('logs', lazy=True))
 
+    # Audit queries page newest-first on id, so id trails each index.
+    __table_args__ = (
+        db.Index('ix_log_table_entry', 'table_name', 'entry_id', 'id'),
+        db.Index('ix_log_user', 'user_id', 'id'),
+        db.Index('ix_log_timestamp', 'timestamp'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'action': self.action,
+            'table_name': self.table_name,
+            'entry_id': self.entry_id,
+            'reason': self.reason,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+        }
+
     def __repr__(self):
         return f'<Log {self.id}: {self.user.username} {self.action} on {self.table_name}>'
+
+class LogArchive(db.Model):
+    """
+    A gzip-compressed partition of Log rows moved out of the hot log table
+    by the retention job. data holds one JSON object per line.
+    """
+    __tablename__ = 'log_archive'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(7), nullable=False, index=True)  # YYYY-MM of the archived rows
+    first_log_id = db.Column(db.Integer, nullable=False)
+    last_log_id = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LogArchive {self.period}: {self.row_count} rows>'
@@ -0,0 +1,67 @@
+# File: app/models/permissions.py
+
+from flask import g, has_request_context
+from sqlalchemy import select
+from app import db
+from app.cache import LRUCache
+from .dynamic_table import DynamicTable
+from .user_table_grant import UserTableGrant
+
+# Compiled permission sets keyed by user id, permissions_version and the raw
+# verb/admin columns. Bumping the version on a User row makes old entries
+# unreachable, so no explicit purge is needed across workers.
+_permission_cache = LRUCache(maxsize=4096)
+
+
+class PermissionSet:
+    def __init__(self, user_id, is_admin, verbs, granted_tables, owned_tables):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.verbs = frozenset(verbs)
+        self.granted_tables = frozenset(granted_tables)
+        self.owned_tables = dict(owned_tables)  # table name -> DynamicTable id
+        self.tables = self.granted_tables | frozenset(self.owned_tables)
+
+    @property
+    def owned_table_ids(self):
+        return frozenset(self.owned_tables.values())
+
+    def can_access(self, table_name):
+        return self.is_admin or table_name in self.tables
+
+    def has(self, verb):
+        return verb in self.verbs
+
+
+def compile_permissions(user):
+    granted = db.session.execute(
+        select(UserTableGrant.table_name).where(UserTableGrant.user_id == user.id)
+    ).scalars().all()
+    owned = db.session.execute(
+        select(DynamicTable.table_name, DynamicTable.id).where(DynamicTable.owner_id == user.id)
+    ).all()
+    verbs = [verb for verb in (user.permissions or '').split(',') if verb]
+    return PermissionSet(user.id, bool(user.is_admin), verbs, granted, owned)
+
+
+def get_permissions(user):
+    """
+    Returns the compiled PermissionSet for user. It is memoised on the request
+    and in a process-wide cache keyed by the user's permissions_version.
+    """
+    key = (user.id, user.permissions_version or 0, user.permissions, bool(user.is_admin))
+    if has_request_context():
+        cached = g.setdefault('_permission_sets', {})
+        if key not in cached:
+            cached[key] = _permission_cache.get_or_set(key, lambda: compile_permissions(user))
+        return cached[key]
+    return _permission_cache.get_or_set(key, lambda: compile_permissions(user))
+
+
+def invalidate_permissions(user):
+    """
+    Marks user's permissions as changed. The caller must commit.
+    """
+    user.permissions_version = (user.permissions_version or 0) + 1
+    if has_request_context():
+        g.pop('_permission_sets', None)
@@ -0,0 +1,226 @@
+# File: app/models/query_cache.py
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from app.cache import LRUCache
+
+_MISSING = object()
+
+# FileBackend refreshes an entry's last use at most this often (seconds), so
+# most hits are reads only.
+USED_RESOLUTION = 60
+
+
+def _row_count(value):
+    # Cached values are (rows, next_cursor) pages.
+    rows, _ = value
+    return len(rows)
+
+
+class MemoryBackend:
+    """
+    Per-process LRU storage; each worker keeps its own entries. Besides the
+    entry count, the rows held across all pages are bounded by max_rows, and
+    a page with more rows than that is not cached.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, max_rows=None):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl, maxweight=max_rows, weigh=_row_count)
+
+    @classmethod
+    def from_config(cls, app):
+        return cls(maxsize=app.config.get('QUERY_CACHE_SIZE', 1024), ttl=app.config.get('QUERY_CACHE_TTL', 300),
+                   max_rows=app.config.get('QUERY_CACHE_MAX_ROWS', 50000))
+
+    def get(self, key):
+        return self.cache.get(key, _MISSING)
+
+    def set(self, key, value):
+        self.cache.set(key, value)
+
+    def invalidate(self, table_name):
+        self.cache.delete_where(lambda key: key[0] == table_name)
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
+
+
+class FileBackend:
+    """
+    LRU storage in a local SQLite file, shared by every worker on the host.
+    Values are pickled, so the file must only be writable by the app. The
+    entry count is kept by triggers, and last use is refreshed at most every
+    USED_RESOLUTION seconds, so recency is approximate to that.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, table_name TEXT NOT NULL, '
+            'value BLOB NOT NULL, expires REAL, used REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_entries_table_name ON entries (table_name)')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_entries_used ON entries (used)')
+        connection.execute('BEGIN IMMEDIATE')
+        connection.execute('CREATE TABLE IF NOT EXISTS counts (id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL)')
+        connection.execute('CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries '
+                           'BEGIN UPDATE counts SET entries = entries + 1; END')
+        connection.execute('CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries '
+                           'BEGIN UPDATE counts SET entries = entries - 1; END')
+        connection.execute('INSERT OR IGNORE INTO counts (id, entries) SELECT 1, COUNT(*) FROM entries')
+        connection.execute('COMMIT')
+
+    @classmethod
+    def from_config(cls, app):
+        path = app.config.get('QUERY_CACHE_PATH') or os.path.join(app.instance_path, 'query_cache.sqlite')
+        return cls(path, maxsize=app.config.get('QUERY_CACHE_SIZE', 1024), ttl=app.config.get('QUERY_CACHE_TTL', 300))
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        digest, now = self._digest(key), time.time()
+        connection = self._connection()
+        row = connection.execute('SELECT value, expires, used FROM entries WHERE key = ?', (digest,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self.misses += 1
+            return _MISSING
+        if now - row[2] >= USED_RESOLUTION:
+            connection.execute('UPDATE entries SET used = ? WHERE key = ?', (now, digest))
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        expires = now + self.ttl if self.ttl else None
+        connection = self._connection()
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete
+        # would not fire the counting trigger.
+        connection.execute(
+            'INSERT INTO entries (key, table_name, value, expires, used) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, used = excluded.used',
+            (self._digest(key), key[0], pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now)
+        )
+        excess = connection.execute('SELECT entries FROM counts').fetchone()[0] - self.maxsize
+        if excess > 0:
+            connection.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used LIMIT ?)', (excess,)
+            )
+            self.evictions += excess
+
+    def invalidate(self, table_name):
+        self._connection().execute('DELETE FROM entries WHERE table_name = ?', (table_name,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM entries')
+
+    def stats(self):
+        return {
+            'size': self._connection().execute('SELECT entries FROM counts').fetchone()[0],
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+class NullBackend:
+    """Caches nothing; every read goes to the database."""
+
+    @classmethod
+    def from_config(cls, app):
+        return cls()
+
+    def get(self, key):
+        return _MISSING
+
+    def set(self, key, value):
+        pass
+
+    def invalidate(self, table_name):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'size': 0}
+
+
+# QUERY_CACHE_BACKEND picks one of these; other backends only need the same
+# methods and a from_config(app) constructor.
+BACKENDS = {
+    'memory': MemoryBackend,
+    'file': FileBackend,
+    'none': NullBackend,
+}
+
+
+class QueryCache:
+    """
+    Results of read queries against dynamic tables, keyed by table name,
+    the table's change generation, the normalised query and the caller's
+    permission scope. Any committed write bumps the generation, so stale
+    entries are never served, even by other workers; writes in this process
+    also drop the table's entries right away to free their space. A table
+    without a generation (no statistics row) is never cached, since its
+    writes could not be told apart.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_or_set(self, table_name, generation, query_key, loader, scope=None):
+        if generation is None:
+            return loader()
+        key = (table_name, generation, query_key, scope)
+        value = self.backend.get(key)
+        if value is _MISSING:
+            value = loader()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, table_name):
+        self.backend.invalidate(table_name)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return dict(self.backend.stats(), backend=type(self.backend).__name__)
+
+
+query_cache = QueryCache(MemoryBackend(maxsize=1024, ttl=300, max_rows=50000))
+
+
+def init_query_cache(app):
+    name = app.config.get('QUERY_CACHE_BACKEND', 'memory')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown query cache backend '{name}'")
+    query_cache.backend = BACKENDS[name].from_config(app)
+    logging.info(f"Query cache backend: {name}")
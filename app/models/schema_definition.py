@@ -1,7 +1,10 @@
 # File: app/models/schema_definition.py
 
 from app import db
+from flask import current_app
+from sqlalchemy import event
 from sqlalchemy.types import JSON
+import difflib
 import json
 
 class SchemaDefinition(db.Model):
@@ -10,12 +13,17 @@ class SchemaDefinition(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), nullable=False)
     description = db.Column(db.Text)
-    structure = db.Column(JSON, nullable=False)
+    structure = db.Column(JSON)  # Full snapshot; NULL for delta versions
+    delta = db.Column(JSON)  # Ops rebuilding this version from parent's structure
+    is_snapshot = db.Column(db.Boolean, default=True, nullable=False)
+    snapshot_distance = db.Column(db.Integer, default=0, nullable=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     version = db.Column(db.Integer, default=1, nullable=False)
     parent_id = db.Column(db.Integer, db.ForeignKey('schema_definitions.id'))
+    # Bumped on every update of this row; versions responses built from it.
+    generation = db.Column(db.BigInteger, default=1, nullable=False)
 
     owner = db.relationship('User', backref=db.backref('owned_schemas', lazy='dynamic'))
     parent = db.relationship('SchemaDefinition', remote_side=[id], backref='children')
@@ -29,10 +37,13 @@ class SchemaDefinition(db.Model):
     def structure_json(self):
         """
         Returns the structure as a Python object.
-        If structure is already a dict, return it directly.
-        If it's a JSON string, parse it first.
+        Snapshot versions parse their own structure column; delta versions
+        are rebuilt from the nearest snapshot ancestor, which is at most
+        SCHEMA_SNAPSHOT_INTERVAL versions away.
         """
-        if isinstance(self.structure, dict):
+        if not self.is_snapshot and self.is_snapshot is not None:
+            return apply_delta(self.parent.get_relationships(), self.delta or [])
+        if isinstance(self.structure, (dict, list)):
             return self.structure
         try:
             return json.loads(self.structure)
@@ -49,10 +60,13 @@ class SchemaDefinition(db.Model):
             # Validate that the string is valid JSON
             json.loads(value)
             self.structure = value
-        elif isinstance(value, dict):
+        elif isinstance(value, (dict, list)):
             self.structure = json.dumps(value)
         else:
             raise ValueError("Structure must be a valid JSON string or a dictionary")
+        self.is_snapshot = True
+        self.delta = None
+        self.snapshot_distance = 0
 
     def get_relationships(self):
         """
@@ -61,14 +75,79 @@ class SchemaDefinition(db.Model):
         structure = self.structure_json
         return structure if isinstance(structure, list) else []
 
-    def create_new_version(self):
+    def create_new_version(self, structure=None, name=None):
+        """
+        Adds a new version derived from this one, holding structure (a list
+        of relationships) or, when omitted, a copy of this version's
+        relationships. name renames the schema; the version number follows
+        the latest version stored under the new name. The new version stores
+        only a delta against this one unless it is due for a full snapshot.
+        """
+        base = self.get_relationships()
+        if structure is None:
+            structure = base
+        name = name or self.name
+        latest = db.session.query(db.func.max(SchemaDefinition.version)).filter_by(name=name).scalar()
+
         new_version = SchemaDefinition(
-            name=self.name,
+            name=name,
             description=self.description,
-            structure=self.structure,
             owner_id=self.owner_id,
-            version=self.version + 1,
+            version=(latest or self.version) + 1,
             parent_id=self.id
         )
+        new_version.parent = self
+
+        interval = current_app.config.get('SCHEMA_SNAPSHOT_INTERVAL', 10)
+        distance = (self.snapshot_distance or 0) + 1
+        if distance >= interval:
+            new_version.structure_json = structure
+        else:
+            new_version.structure = None
+            new_version.delta = compute_delta(base, structure)
+            new_version.is_snapshot = False
+            new_version.snapshot_distance = distance
         db.session.add(new_version)
         return new_version
+
+    def materialize(self):
+        """
+        Turns a delta version into a full snapshot, e.g. before its parent
+        is deleted.
+        """
+        if not self.is_snapshot:
+            self.structure_json = self.get_relationships()
+
+def _relationship_key(relationship):
+    return json.dumps(relationship, sort_keys=True)
+
+def compute_delta(base, target):
+    """
+    Returns a list of ops that rebuild target from base: ['copy', start, end]
+    copies base[start:end], ['add', items] appends new relationships.
+    """
+    matcher = difflib.SequenceMatcher(
+        a=[_relationship_key(item) for item in base],
+        b=[_relationship_key(item) for item in target],
+        autojunk=False
+    )
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['copy', i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(['add', target[j1:j2]])
+    return ops
+
+def apply_delta(base, ops):
+    result = []
+    for op in ops:
+        if op[0] == 'copy':
+            result.extend(base[op[1]:op[2]])
+        else:
+            result.extend(op[1])
+    return result
+
+@event.listens_for(SchemaDefinition, 'before_update')
+def _bump_generation(mapper, connection, target):
+    target.generation = (target.generation or 0) + 1
@@ -0,0 +1,144 @@
+# File: app/models/schema_graph.py
+
+from collections import deque
+from app.cache import LRUCache
+
+# Graphs keyed by (schema id, version, updated_at). Schema edits create a new
+# version row, so a cached graph never goes stale.
+_graph_cache = LRUCache(maxsize=256)
+
+
+class SchemaGraph:
+    """
+    Adjacency-list view of a schema's parent -> child relationships.
+
+    Node ids are assigned in first-seen order and looked up through a dict,
+    so building the graph and every traversal is linear in its size.
+    """
+
+    def __init__(self, relationships):
+        self.node_ids = {}
+        self.links = []
+        self.children = {}
+        self.parents = {}
+
+        for relationship in relationships:
+            parent = relationship.get('parent')
+            child = relationship.get('child')
+            if not parent or not child:
+                continue
+            for node in (parent, child):
+                if node not in self.node_ids:
+                    self.node_ids[node] = len(self.node_ids)
+                    self.children[node] = []
+                    self.parents[node] = []
+            rel_type = relationship.get('type', 'unknown')
+            self.children[parent].append((child, rel_type))
+            self.parents[child].append((parent, rel_type))
+            self.links.append({
+                'source': self.node_ids[parent],
+                'target': self.node_ids[child],
+                'type': rel_type
+            })
+
+    def __contains__(self, node):
+        return node in self.node_ids
+
+    @property
+    def nodes(self):
+        return list(self.node_ids)
+
+    def to_visualization(self):
+        return {
+            'nodes': [{'id': node} for node in self.node_ids],
+            'links': self.links
+        }
+
+    def _reachable(self, start, adjacency):
+        seen = {start}
+        order = []
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbour, _ in adjacency.get(node, ()):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    order.append(neighbour)
+                    queue.append(neighbour)
+        return order
+
+    def descendants(self, node):
+        """Tables reachable by following child links from node, nearest first."""
+        return self._reachable(node, self.children)
+
+    def ancestors(self, node):
+        """Tables reachable by following parent links from node, nearest first."""
+        return self._reachable(node, self.parents)
+
+    def shortest_path(self, source, target, directed=True):
+        """
+        Returns the shortest list of tables from source to target, or None if
+        they are not connected. With directed=False links may be followed in
+        either direction.
+        """
+        if source not in self or target not in self:
+            return None
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path[::-1]
+            neighbours = self.children[node] if directed else self.children[node] + self.parents[node]
+            for neighbour, _ in neighbours:
+                if neighbour not in previous:
+                    previous[neighbour] = node
+                    queue.append(neighbour)
+        return None
+
+    def find_cycles(self):
+        """
+        Returns one cycle (as a list of tables, first table repeated at the end)
+        for every back edge found by an iterative depth-first search.
+        """
+        WHITE, GREY, BLACK = 0, 1, 2
+        colour = dict.fromkeys(self.node_ids, WHITE)
+        cycles = []
+        for root in self.node_ids:
+            if colour[root] != WHITE:
+                continue
+            colour[root] = GREY
+            path = [root]
+            position = {root: 0}
+            stack = [iter(self.children[root])]
+            while stack:
+                advanced = False
+                for child, _ in stack[-1]:
+                    if colour[child] == WHITE:
+                        colour[child] = GREY
+                        position[child] = len(path)
+                        path.append(child)
+                        stack.append(iter(self.children[child]))
+                        advanced = True
+                        break
+                    if colour[child] == GREY:
+                        cycles.append(path[position[child]:] + [child])
+                if not advanced:
+                    node = path.pop()
+                    del position[node]
+                    colour[node] = BLACK
+                    stack.pop()
+        return cycles
+
+
+def get_schema_graph(schema):
+    """
+    Returns the cached SchemaGraph for a SchemaDefinition, building it on
+    first use.
+    """
+    key = (schema.id, schema.version, schema.updated_at)
+    return _graph_cache.get_or_set(key, lambda: SchemaGraph(schema.get_relationships()))
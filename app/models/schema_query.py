@@ -0,0 +1,198 @@
+# File: app/models/schema_query.py
+
+from collections import deque
+from sqlalchemy import select, bindparam, literal, null, cast, union_all
+from app import db
+from app.cache import LRUCache
+from .dynamic_tables import get_table_class
+from .table_registry import table_registry
+from .schema_graph import get_schema_graph
+from .column_types import column_type_name, coerce_value
+
+# Compiled plans keyed by schema version, root table, the tables the caller
+# may see and their registry generations, so DDL or a new version never
+# reuses a stale statement.
+_plan_cache = LRUCache(maxsize=256)
+
+
+def join_condition(parent, child):
+    """
+    Returns the ON clause linking a parent and child dynamic table, or None.
+    A child column named <parent>_id references the parent's id; otherwise
+    two core-dependent tables are joined on their shared core_uuid.
+    """
+    link_column = f'{parent.name}_id'
+    if link_column in child.c:
+        return child.c[link_column] == parent.c.id
+    if 'core_uuid' in parent.c and 'core_uuid' in child.c:
+        return child.c.core_uuid == parent.c.core_uuid
+    return None
+
+
+class SchemaQueryPlan:
+    """
+    A single SELECT that walks a schema's relationship graph from a root
+    table along a breadth-first spanning tree. Each root-to-leaf path of the
+    tree is LEFT OUTER JOINed in its own branch and the branches are
+    combined with UNION ALL, so sibling tables add rows (N + M per root)
+    instead of multiplying (N x M). Root rows are filtered and paged by id in
+    a subquery, so one-to-many joins never split or shrink a page. Statements
+    are built once per set of filter columns and reused with fresh bound
+    values.
+    """
+
+    def __init__(self, root_name, tables, joins, skipped):
+        self.root_name = root_name
+        self.tables = tables  # name -> Table, in join order
+        self.joins = joins  # (parent name, child name) pairs actually joined
+        self.skipped = skipped  # relationships with no usable join column
+        self._statements = {}
+
+    def statement(self, filter_columns=()):
+        filter_columns = tuple(sorted(filter_columns))
+        if filter_columns not in self._statements:
+            self._statements[filter_columns] = self._build_statement(filter_columns)
+        return self._statements[filter_columns]
+
+    def _build_statement(self, filter_columns):
+        root = self.tables[self.root_name]
+        root_page = (select(root)
+                     .where(root.c.id > bindparam('after'),
+                            *[root.c[name] == bindparam(f'filter_{name}') for name in filter_columns])
+                     .order_by(root.c.id)
+                     .limit(bindparam('limit'))
+                     .subquery(self.root_name))
+        aliases = {self.root_name: root_page}
+        for _, child_name in self.joins:
+            aliases[child_name] = self.tables[child_name].alias(child_name)
+
+        branches = []
+        for position, path in enumerate(self.paths()):
+            from_clause = root_page
+            for parent_name, child_name in path:
+                parent, child = aliases[parent_name], aliases[child_name]
+                on = join_condition(parent, child)
+                if on is None:
+                    # Children may also point back at their parent.
+                    on = join_condition(child, parent)
+                from_clause = from_clause.outerjoin(child, on)
+            on_path = {self.root_name} | {child_name for _, child_name in path}
+            columns = [literal(position).label('_path')]
+            for name, alias in aliases.items():
+                columns.extend(
+                    (column if name in on_path else cast(null(), column.type)).label(f'{name}__{column.name}')
+                    for column in alias.c
+                )
+            branches.append(select(*columns).select_from(from_clause))
+
+        combined = union_all(*branches).subquery('paths')
+        order = [combined.c[f'{self.root_name}__id'], combined.c._path] + \
+                [combined.c[f'{child}__id'] for _, child in self.joins]
+        return select(combined).order_by(*order)
+
+    def paths(self):
+        """The (parent, child) joins from the root to each leaf of the spanning tree."""
+        children = {}
+        for parent_name, child_name in self.joins:
+            children.setdefault(parent_name, []).append(child_name)
+
+        paths = []
+        def walk(name, path):
+            if name not in children:
+                paths.append(path)
+            for child_name in children.get(name, ()):
+                walk(child_name, path + [(name, child_name)])
+        walk(self.root_name, [])
+        return paths
+
+    def execute(self, after=0, limit=50, filters=None):
+        """
+        Runs the plan and returns (rows, next_after). filters maps root-table
+        column names to values. Each row maps table name -> column dict, or
+        None for tables with no matching row. Raises ValueError on unknown
+        filter columns or values that do not fit the column type.
+        """
+        root = self.tables[self.root_name]
+        params = {'after': after, 'limit': limit}
+        for name, value in (filters or {}).items():
+            if name not in root.c:
+                raise ValueError(f"Cannot filter by unknown column '{name}'")
+            params[f'filter_{name}'] = coerce_value(column_type_name(root, name), value)
+
+        rows = []
+        root_ids = set()
+        last_root_id = None
+        pending = []  # rows of the current root
+        stmt = self.statement(filters or ())
+        for record in db.session.execute(stmt, params).mappings():
+            root_id = record[f'{self.root_name}__id']
+            if root_id != last_root_id:
+                rows.extend(self._trim(pending))
+                pending = []
+            row = {}
+            for name, table in self.tables.items():
+                values = {column.name: record[f'{name}__{column.name}'] for column in table.c}
+                row[name] = values if values.get('id') is not None else None
+            pending.append(row)
+            last_root_id = root_id
+            root_ids.add(last_root_id)
+        rows.extend(self._trim(pending))
+        next_after = last_root_id if len(root_ids) >= limit else None
+        return rows, next_after
+
+    def _trim(self, rows):
+        # Every path yields a root-only row when it finds nothing; keep one
+        # only if the root has no related rows at all.
+        related = [row for row in rows if any(row[name] is not None for name in self.tables if name != self.root_name)]
+        return related or rows[:1]
+
+
+def compile_plan(schema, root_name, allowed_tables):
+    """
+    Returns the cached SchemaQueryPlan for schema rooted at root_name,
+    restricted to allowed_tables. Raises ValueError if the root table is not
+    part of the schema or not accessible.
+    """
+    graph = get_schema_graph(schema)
+    if root_name not in graph:
+        raise ValueError(f"Table '{root_name}' is not part of schema '{schema.name}'")
+    if root_name not in allowed_tables:
+        raise ValueError(f"You do not have access to table '{root_name}'")
+
+    reachable = [root_name] + [name for name in graph.descendants(root_name) + graph.ancestors(root_name)
+                               if name in allowed_tables]
+    generations = tuple(table_registry.generation_for(name) for name in sorted(set(reachable)))
+    key = (schema.id, schema.version, root_name, tuple(sorted(set(reachable))), generations)
+    return _plan_cache.get_or_set(key, lambda: _build_plan(graph, root_name, set(reachable)))
+
+
+def _build_plan(graph, root_name, candidates):
+    tables = {root_name: get_table_class(root_name)}
+    if tables[root_name] is None:
+        raise ValueError(f"Table '{root_name}' does not exist")
+
+    joins = []
+    skipped = []
+    queue = deque([root_name])
+    while queue:
+        current = queue.popleft()
+        neighbours = [(child, True) for child, _ in graph.children[current]] + \
+                     [(parent, False) for parent, _ in graph.parents[current]]
+        for name, is_child in neighbours:
+            if name in tables or name not in candidates:
+                continue
+            table = get_table_class(name)
+            if table is None:
+                continue
+            parent, child = (tables[current], table) if is_child else (table, tables[current])
+            if join_condition(parent, child) is None and join_condition(child, parent) is None:
+                skipped.append({'parent': parent.name, 'child': child.name})
+                continue
+            tables[name] = table
+            joins.append((current, name))
+            queue.append(name)
+    return SchemaQueryPlan(root_name, tables, joins, skipped)
+
+
+def plan_stats():
+    return _plan_cache.stats()
@@ -0,0 +1,249 @@
+# File: app/models/search.py
+
+import logging
+import re
+from sqlalchemy import select, text
+from app import db
+from .core_table import CoreTable
+from .dynamic_table import DynamicTable
+from .table_query import encode_cursor, decode_cursor
+
+CORE_TABLE = 'core_table'
+CORE_SEARCH_COLUMNS = ['name', 'description']
+
+# The text search configuration used on PostgreSQL; 'simple' does no
+# language-specific stemming, matching FTS5's default tokenizer.
+TS_CONFIG = 'simple'
+
+WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def search_backend():
+    """'fts5', 'postgresql' or 'like' for the current database."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return 'postgresql'
+    if dialect == 'sqlite' and _sqlite_has_fts5():
+        return 'fts5'
+    return 'like'
+
+
+_fts5_available = None
+
+
+def _sqlite_has_fts5():
+    global _fts5_available
+    if _fts5_available is None:
+        with db.engine.connect() as connection:
+            options = connection.execute(text('PRAGMA compile_options')).scalars().all()
+        _fts5_available = 'ENABLE_FTS5' in options
+    return _fts5_available
+
+
+def search_columns(table_name, connection=None):
+    """
+    The columns indexed for table_name: CoreTable's name and description, or
+    the string columns declared in a dynamic table's schema. Reads through
+    connection when given, else the session.
+    """
+    if table_name == CORE_TABLE:
+        return list(CORE_SEARCH_COLUMNS)
+    schema = (connection or db.session).execute(
+        select(DynamicTable.schema).where(DynamicTable.table_name == table_name)
+    ).scalar()
+    return [name for name, type_name in (schema or {}).items() if type_name == 'string']
+
+
+def _quote(name):
+    return db.engine.dialect.identifier_preparer.quote(name)
+
+
+def _index_name(table_name):
+    return f'_fts_{table_name}'
+
+
+def _tsvector(columns):
+    document = " || ' ' || ".join(f"coalesce({_quote(name)}, '')" for name in columns)
+    return f"to_tsvector('{TS_CONFIG}', {document})"
+
+
+def fts5_query(query):
+    """
+    Turns free text into an FTS5 query: every word must match, the last one
+    as a prefix. Quoting each word keeps FTS5 operators in user input inert.
+    """
+    words = WORD.findall(query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words[:-1]) + (' ' if len(words) > 1 else '') + f'"{words[-1]}"*'
+
+
+def drop_search_index(table_name):
+    index = _quote(_index_name(table_name))
+    backend = search_backend()
+    if backend == 'fts5':
+        with db.engine.begin() as connection:
+            for event in ('insert', 'update', 'delete'):
+                connection.execute(text(f'DROP TRIGGER IF EXISTS {_quote(f"{_index_name(table_name)}_{event}")}'))
+            connection.execute(text(f'DROP TABLE IF EXISTS {index}'))
+    elif backend == 'postgresql':
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {index}'))
+
+
+def create_search_index(table_name, rebuild=False):
+    """
+    Creates the full-text index for table_name if it does not exist, or
+    recreates it from scratch with rebuild=True (needed after its string
+    columns change).
+
+    On SQLite this is an external-content FTS5 table kept in sync by AFTER
+    INSERT/UPDATE/DELETE triggers, so every write path - forms, the JSON API,
+    CSV import, ALTER rebuilds - updates it in the same transaction. On
+    PostgreSQL it is a GIN expression index over to_tsvector(), which the
+    database maintains itself. Returns False if the table has no string
+    columns to index.
+
+    The DDL runs on its own connections and the session is not touched, so
+    the caller must commit (or roll back) its own transaction first; on
+    PostgreSQL, CREATE INDEX CONCURRENTLY waits for open transactions.
+    """
+    with db.engine.connect() as connection:
+        columns = search_columns(table_name, connection)
+    if rebuild:
+        drop_search_index(table_name)
+    if not columns:
+        return False
+
+    backend = search_backend()
+    table, index = _quote(table_name), _quote(_index_name(table_name))
+    if backend == 'fts5':
+        with db.engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': _index_name(table_name)}
+            ).first()
+            if exists:
+                return True
+            names = ', '.join(_quote(name) for name in columns)
+            new_values = ', '.join(f'new.{_quote(name)}' for name in columns)
+            old_values = ', '.join(f'old.{_quote(name)}' for name in columns)
+            delete_old = f"INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+            insert_new = f'INSERT INTO {index} (rowid, {names}) VALUES (new.id, {new_values});'
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {index} USING fts5({names}, content={table}, content_rowid='id')"
+            ))
+            for event, timing, body in (
+                ('insert', 'AFTER INSERT', insert_new),
+                ('update', f'AFTER UPDATE OF {names}', delete_old + ' ' + insert_new),
+                ('delete', 'AFTER DELETE', delete_old),
+            ):
+                trigger = _quote(f'{_index_name(table_name)}_{event}')
+                connection.execute(text(f'CREATE TRIGGER {trigger} {timing} ON {table} BEGIN {body} END'))
+            connection.execute(text(f"INSERT INTO {index} ({index}) VALUES ('rebuild')"))
+    elif backend == 'postgresql':
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} USING GIN ({_tsvector(columns)})'
+            ))
+    else:
+        return False
+    logging.info(f"Search index ready for {table_name} ({', '.join(columns)})")
+    return True
+
+
+def ensure_search_indexes(rebuild=False):
+    """
+    Creates (or rebuilds) the search index of the core table and every
+    dynamic table. Like create_search_index, the caller must not hold an
+    open transaction.
+    """
+    with db.engine.connect() as connection:
+        names = [CORE_TABLE] + connection.execute(select(DynamicTable.table_name)).scalars().all()
+    return [name for name in names if create_search_index(name, rebuild=rebuild)]
+
+
+def _ranked_ids(table_name, columns, query, after, limit):
+    """
+    Returns [(id, score)] for the best matches, best first. Scores are
+    ordered ascending on every backend (FTS5's bm25 is negative for better
+    matches; ts_rank is negated), so (score, id) is a stable keyset. ts_rank
+    is a float4; it is cast to float8 so the score in a cursor compares
+    exactly equal to the stored one.
+    """
+    table, index = _quote(table_name), _quote(_index_name(table_name))
+    params = {'limit': limit}
+    backend = search_backend()
+    if backend == 'fts5':
+        match = fts5_query(query)
+        if match is None:
+            return []
+        params['query'] = match
+        ranked = f'SELECT rowid AS id, bm25({index}) AS score FROM {index} WHERE {index} MATCH :query'
+    elif backend == 'postgresql':
+        params['query'] = query
+        vector = _tsvector(columns)
+        ranked = (f"SELECT id, -CAST(ts_rank({vector}, q) AS double precision) AS score FROM {table}, "
+                  f"websearch_to_tsquery('{TS_CONFIG}', :query) q WHERE {vector} @@ q")
+    else:
+        words = WORD.findall(query)
+        if not words:
+            return []
+        clauses = []
+        for position, word in enumerate(words):
+            params[f'word_{position}'] = f'%{word}%'
+            clauses.append('(' + ' OR '.join(f'{_quote(name)} LIKE :word_{position}' for name in columns) + ')')
+        ranked = f"SELECT id, 0.0 AS score FROM {table} WHERE {' AND '.join(clauses)}"
+
+    keyset = ''
+    if after is not None:
+        params['after_score'], params['after_id'] = after
+        keyset = 'WHERE score > :after_score OR (score = :after_score AND id > :after_id)'
+    sql = f'SELECT id, score FROM ({ranked}) AS ranked {keyset} ORDER BY score, id LIMIT :limit'
+    return [tuple(row) for row in db.session.execute(text(sql), params).all()]
+
+
+def search_table(table_name, query, limit=20, cursor=None):
+    """
+    Runs a ranked full-text search over one table and returns
+    (rows, next_cursor). Each row is the matching record as a dict with its
+    'score' (lower is better) and, for dynamic tables linked to the core
+    table, its 'core' record. Raises ValueError on a bad cursor or a table
+    with nothing to search.
+    """
+    from .core_cache import get_many
+    from .query_cache import query_cache
+    from .table_statistics import table_generation
+
+    columns = search_columns(table_name)
+    if not columns:
+        raise ValueError(f"Table '{table_name}' has no text columns to search")
+    after = decode_cursor(cursor) if cursor else None
+    rows, next_cursor = query_cache.get_or_set(
+        table_name, table_generation(table_name), ('search', query, limit, after),
+        lambda: _search_page(table_name, columns, query, after, limit)
+    )
+    # Copies, so the cached page is never modified.
+    rows = [dict(row) for row in rows]
+    if rows and 'core_uuid' in rows[0] and table_name != CORE_TABLE:
+        cores = get_many(row['core_uuid'] for row in rows)
+        for row in rows:
+            row['core'] = cores.get(row['core_uuid'])
+    return rows, next_cursor
+
+
+def _search_page(table_name, columns, query, after, limit):
+    from .dynamic_tables import get_table_class
+
+    matches = _ranked_ids(table_name, columns, query, after, limit + 1)
+    page, has_more = matches[:limit], len(matches) > limit
+    if not page:
+        return [], None
+
+    Table = CoreTable.__table__ if table_name == CORE_TABLE else get_table_class(table_name)
+    ids = [match_id for match_id, _ in page]
+    records = {row['id']: dict(row) for row in
+               db.session.execute(select(Table).where(Table.c.id.in_(ids))).mappings()}
+    rows = [dict(records[match_id], score=score) for match_id, score in page if match_id in records]
+    next_cursor = encode_cursor(page[-1][1], page[-1][0]) if has_more else None
+    return rows, next_cursor
@@ -0,0 +1,103 @@
+# File: app/models/statement_cache.py
+
+import logging
+from sqlalchemy import select, insert, update, delete, bindparam
+from app.cache import LRUCache
+from .table_registry import table_registry
+
+# Bound parameters are prefixed with '_' so they never clash with column names
+# in the VALUES/SET clauses (SQLAlchemy reserves bare column names there).
+ID_PARAM = '_id'
+IDS_PARAM = '_ids'
+UUIDS_PARAM = '_uuids'
+
+
+def _select_by_id(Table, columns):
+    return select(Table).where(Table.c.id == bindparam(ID_PARAM))
+
+
+def _select_ids_in(Table, columns):
+    return select(Table.c.id).where(Table.c.id.in_(bindparam(IDS_PARAM, expanding=True)))
+
+
+def _select_by_core_uuids(Table, columns):
+    return (select(Table)
+            .where(Table.c.core_uuid.in_(bindparam(UUIDS_PARAM, expanding=True)))
+            .order_by(Table.c.id))
+
+
+def _select_all(Table, columns):
+    return select(Table).order_by(Table.c.id)
+
+
+def _insert(Table, columns):
+    return insert(Table).values({name: bindparam(f'_{name}') for name in columns})
+
+
+def _update_by_id(Table, columns):
+    return (update(Table)
+            .where(Table.c.id == bindparam(ID_PARAM))
+            .values({name: bindparam(f'_{name}') for name in columns}))
+
+
+def _delete_by_id(Table, columns):
+    return delete(Table).where(Table.c.id == bindparam(ID_PARAM))
+
+
+BUILDERS = {
+    'select_by_id': _select_by_id,
+    'select_ids_in': _select_ids_in,
+    'select_by_core_uuids': _select_by_core_uuids,
+    'select_all': _select_all,
+    'insert': _insert,
+    'update_by_id': _update_by_id,
+    'delete_by_id': _delete_by_id,
+}
+
+
+class StatementCache:
+    """
+    Reuses the select/insert/update/delete constructs used for dynamic-table
+    CRUD. Statements are keyed by (table name, registry generation,
+    operation, column set) and take their values through bound parameters, so
+    the same construct - and SQLAlchemy's compiled form of it - serves every
+    request. DDL bumps the registry generation, which retires old entries;
+    invalidate() also drops them eagerly.
+    """
+
+    def __init__(self, maxsize=2048):
+        self._cache = LRUCache(maxsize=maxsize)
+
+    def get(self, Table, operation, columns=()):
+        """
+        Returns the statement for operation against Table. columns is the set
+        of columns written by 'insert' and 'update_by_id'; values are passed
+        as '_<column>' parameters, the row id as '_id'.
+        """
+        columns = tuple(sorted(columns))
+        key = (Table.name, table_registry.generation_for(Table.name), operation, columns)
+        cached = self._cache.get(key)
+        # Tables reflected outside the registry share names but not identity.
+        if cached is not None and cached[0] is Table:
+            return cached[1]
+        stmt = BUILDERS[operation](Table, columns)
+        self._cache.set(key, (Table, stmt))
+        return stmt
+
+    def invalidate(self, table_name=None):
+        if table_name is None:
+            self._cache.clear()
+        else:
+            self._cache.delete_where(lambda key: key[0] == table_name)
+        logging.info(f"Statement cache invalidated {table_name or 'all tables'}")
+
+    def stats(self):
+        return self._cache.stats()
+
+
+statement_cache = StatementCache()
+
+
+def bind_values(values):
+    """Prefixes column values for use with cached insert/update statements."""
+    return {f'_{name}': value for name, value in values.items()}
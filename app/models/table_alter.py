@@ -0,0 +1,319 @@
+# File: app/models/table_alter.py
+
+import logging
+import re
+import threading
+import time
+from sqlalchemy import MetaData, Table as SqlTable, Column, Integer, Index, select, insert, update, bindparam, text, inspect
+from app import db
+from .dynamic_table import DynamicTable
+from .core_table import CoreTable
+from .dynamic_tables import build_table, get_table_class, invalidate_table
+from .column_types import sql_type, coerce_value
+from .table_indexes import surviving_indexes
+from .search import create_search_index
+from .table_statistics import record_change
+from .table_relationship import schema_join_columns
+
+# Columns every dynamic table carries; they cannot be altered.
+RESERVED_COLUMNS = {'id', 'created_at', 'updated_at', 'core_uuid'}
+
+COLUMN_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+_progress = {}
+_progress_lock = threading.Lock()
+
+
+def get_alter_progress(table_name):
+    """
+    Returns the progress of the last ALTER run against table_name as a dict
+    with state ('copying', 'swapping', 'done' or 'failed'), rows_copied,
+    rows_total and error, or None if the table was never altered.
+    """
+    with _progress_lock:
+        progress = _progress.get(table_name)
+        return dict(progress) if progress else None
+
+
+def _set_progress(table_name, **values):
+    with _progress_lock:
+        _progress.setdefault(table_name, {}).update(values)
+
+
+def _claim(table_name):
+    with _progress_lock:
+        current = _progress.get(table_name)
+        if current and current['state'] in ('copying', 'swapping'):
+            raise ValueError(f"Table '{table_name}' is already being altered")
+        _progress[table_name] = {'state': 'copying', 'rows_copied': 0, 'rows_total': 0,
+                                 'error': None, 'started_at': time.time()}
+
+
+def _new_schema(schema, add, drop, retype):
+    """Validates the requested changes and returns the resulting schema."""
+    schema = dict(schema)
+    for name in list(add) + list(drop) + list(retype):
+        if name in RESERVED_COLUMNS:
+            raise ValueError(f"Column '{name}' cannot be altered")
+    for name, type_name in add.items():
+        if not COLUMN_NAME.match(name):
+            raise ValueError(f"'{name}' is not a valid column name")
+        if name in schema:
+            raise ValueError(f"Column '{name}' already exists")
+        schema[name] = type_name
+    for name in drop:
+        if name not in schema:
+            raise ValueError(f"Column '{name}' does not exist")
+        del schema[name]
+    for name, type_name in retype.items():
+        if name not in schema:
+            raise ValueError(f"Column '{name}' does not exist")
+        schema[name] = type_name
+    for name, type_name in list(add.items()) + list(retype.items()):
+        if sql_type(type_name) is None:
+            raise ValueError(f"Unknown column type '{type_name}' for '{name}'")
+    if not schema:
+        raise ValueError('A table needs at least one column')
+    return schema
+
+
+def alter_dynamic_table(table_name, add=None, drop=None, retype=None, batch_size=1000, progress=None, force=False):
+    """
+    Adds, drops and retypes columns of an existing dynamic table.
+
+    add and retype map column names to type names; drop lists column names.
+    On PostgreSQL the change is a native ALTER TABLE. On SQLite, new columns
+    are added with ALTER TABLE ADD COLUMN, while drops and type changes
+    rebuild the table online: rows are copied into a shadow table in chunks
+    of batch_size (one short transaction each) while triggers mirror
+    concurrent writes, then the tables are swapped. In both cases the DDL and
+    the DynamicTable.schema update commit in one transaction, and the
+    registry entry is refreshed afterwards.
+
+    progress, if given, is called with (rows_copied, rows_total) after every
+    chunk. The current session is committed first, since the DDL runs on its
+    own connections. Raises ValueError for invalid changes, values that do
+    not fit a new column type, or - unless force is set - dropping or
+    retyping a column that a schema joins on.
+    """
+    add, drop, retype = add or {}, list(drop or []), retype or {}
+    Table = get_table_class(table_name)
+    if Table is None:
+        raise ValueError(f"Table '{table_name}' does not exist")
+    info = Table.info['dynamic_table']
+    # Unchanged types are no-ops rather than full rebuilds.
+    retype = {name: type_name for name, type_name in retype.items() if info['schema'].get(name) != type_name}
+    schema = _new_schema(info['schema'], add, drop, retype)
+    if not force:
+        _check_join_columns(table_name, set(drop) | set(retype))
+    db.session.commit()
+
+    _claim(table_name)
+    try:
+        if db.engine.dialect.name == 'postgresql':
+            _alter_native(Table, add, drop, retype, schema)
+        elif drop or retype:
+            _alter_copy_and_swap(Table, info, schema, retype, batch_size, progress)
+        else:
+            _alter_add_columns(Table, add, schema)
+    except Exception as e:
+        _set_progress(table_name, state='failed', error=str(e))
+        raise
+    finally:
+        invalidate_table(table_name)
+
+    # The indexed text columns may have changed, and a rebuild drops the
+    # old table's sync triggers along with it. The columns are already
+    # altered at this point, but the table must not stay claimed.
+    try:
+        create_search_index(table_name, rebuild=True)
+    except Exception as e:
+        _set_progress(table_name, state='failed', error=f'Columns altered, but the search index rebuild failed: {e}')
+        raise
+    _set_progress(table_name, state='done')
+    logging.info(f"Altered {table_name}: added {list(add)}, dropped {drop}, retyped {list(retype)}")
+    return schema
+
+
+def _check_join_columns(table_name, columns):
+    joined = schema_join_columns(table_name)
+    conflicts = [f"'{name}' (joined on by {', '.join(joined[name])})" for name in sorted(columns) if name in joined]
+    if conflicts:
+        raise ValueError(f"Cannot drop or retype {'; '.join(conflicts)}. Update those schemas first, "
+                         f"or force the change.")
+
+
+def _quote(name):
+    return db.engine.dialect.identifier_preparer.quote(name)
+
+
+def _type_sql(type_name):
+    return sql_type(type_name).compile(dialect=db.engine.dialect)
+
+
+def _scratch_metadata():
+    # Dynamic tables reference core_table, so definitions built outside
+    # db.metadata need a copy of it to resolve the foreign key.
+    metadata = MetaData()
+    CoreTable.__table__.to_metadata(metadata)
+    return metadata
+
+
+def _update_schema(connection, table_name, schema):
+    dynamic_tables = DynamicTable.__table__
+    indexes = connection.execute(
+        select(dynamic_tables.c.indexes).where(dynamic_tables.c.table_name == table_name)
+    ).scalar()
+    # Dropped columns take their indexes with them.
+    indexes = surviving_indexes(indexes or [], list(RESERVED_COLUMNS) + list(schema))
+    connection.execute(
+        dynamic_tables.update()
+        .where(dynamic_tables.c.table_name == table_name)
+        .values(schema=schema, indexes=indexes, updated_at=db.func.current_timestamp())
+    )
+    record_change(table_name, connection=connection)
+
+
+def _alter_native(Table, add, drop, retype, schema):
+    table = _quote(Table.name)
+    with db.engine.begin() as connection:
+        for name, type_name in add.items():
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {_quote(name)} {_type_sql(type_name)}'))
+        for name in drop:
+            connection.execute(text(f'ALTER TABLE {table} DROP COLUMN {_quote(name)}'))
+        for name, type_name in retype.items():
+            column, new_type = _quote(name), _type_sql(type_name)
+            connection.execute(text(
+                f'ALTER TABLE {table} ALTER COLUMN {column} TYPE {new_type} USING {column}::{new_type}'
+            ))
+        _update_schema(connection, Table.name, schema)
+
+
+def _alter_add_columns(Table, add, schema):
+    # SQLite adds columns by editing the stored definition; no rows move.
+    table = _quote(Table.name)
+    with db.engine.begin() as connection:
+        for name, type_name in add.items():
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {_quote(name)} {_type_sql(type_name)}'))
+        _update_schema(connection, Table.name, schema)
+
+
+def _alter_copy_and_swap(Table, info, schema, retype, batch_size, progress):
+    table_name = Table.name
+    shadow_name = f'_{table_name}_new'
+    metadata = _scratch_metadata()
+    shadow = build_table(shadow_name, metadata, schema, info['is_independent'])
+    # Ids of rows the mirror triggers wrote, which skipped the conversion.
+    mirrored = SqlTable(f'_{table_name}_mirrored', metadata, Column('id', Integer, primary_key=True))
+    shared = [column.name for column in shadow.columns if column.name in Table.c]
+    indexes = [index for index in inspect(db.engine).get_indexes(table_name)
+               if all(column in shadow.c for column in index['column_names'])]
+
+    with db.engine.begin() as connection:
+        shadow.drop(connection, checkfirst=True)
+        mirrored.drop(connection, checkfirst=True)
+        shadow.create(connection)
+        mirrored.create(connection)
+        _create_mirror_triggers(connection, table_name, shadow_name, mirrored.name, shared)
+
+    try:
+        with db.engine.connect() as connection:
+            total = connection.execute(select(db.func.count()).select_from(Table)).scalar()
+        _set_progress(table_name, rows_total=total)
+        _copy_rows(Table, shadow, shared, retype, batch_size, total, progress)
+
+        _set_progress(table_name, state='swapping')
+        with db.engine.begin() as connection:
+            _drop_mirror_triggers(connection, table_name)
+            if retype:
+                _convert_mirrored_rows(connection, Table, shadow, mirrored, retype)
+            mirrored.drop(connection)
+            connection.execute(text(f'ALTER TABLE {_quote(table_name)} RENAME TO {_quote("_" + table_name + "_old")}'))
+            connection.execute(text(f'ALTER TABLE {_quote(shadow_name)} RENAME TO {_quote(table_name)}'))
+            connection.execute(text(f'DROP TABLE {_quote("_" + table_name + "_old")}'))
+            swapped = build_table(table_name, _scratch_metadata(), schema, info['is_independent'])
+            for index in indexes:
+                Index(index['name'], *[swapped.c[column] for column in index['column_names']],
+                      unique=bool(index['unique'])).create(connection)
+            _update_schema(connection, table_name, schema)
+    except Exception:
+        with db.engine.begin() as connection:
+            _drop_mirror_triggers(connection, table_name)
+            shadow.drop(connection, checkfirst=True)
+            mirrored.drop(connection, checkfirst=True)
+        raise
+
+
+def _copy_rows(Table, shadow, shared, retype, batch_size, total, progress):
+    """
+    Copies Table into shadow in id order, one transaction per chunk. Rows the
+    mirror triggers already wrote are newer and are left alone.
+    """
+    source_columns = [Table.c[name] for name in shared]
+    stmt = insert(shadow).prefix_with('OR IGNORE')
+    last_id = 0
+    copied = 0
+    while True:
+        with db.engine.begin() as connection:
+            rows = connection.execute(
+                select(*source_columns).where(Table.c.id > last_id).order_by(Table.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            connection.execute(stmt, [_convert(row, retype) for row in rows])
+        last_id = rows[-1]['id']
+        copied += len(rows)
+        _set_progress(Table.name, rows_copied=copied)
+        if progress is not None:
+            progress(copied, total)
+
+
+def _convert(row, retype):
+    record = dict(row)
+    for name, type_name in retype.items():
+        if name in record:
+            try:
+                record[name] = coerce_value(type_name, record[name])
+            except ValueError as e:
+                raise ValueError(f"Row {record['id']}, column '{name}': {e}")
+    return record
+
+
+def _convert_mirrored_rows(connection, Table, shadow, mirrored, retype):
+    """
+    Converts the retyped columns of rows written by the mirror triggers, which
+    copy values as they are. Runs in the swap transaction, so a value that
+    does not fit its new type fails the swap instead of being committed.
+    """
+    columns = [Table.c.id] + [Table.c[name] for name in retype]
+    rows = connection.execute(select(*columns).where(Table.c.id.in_(select(mirrored.c.id)))).mappings().all()
+    if not rows:
+        return
+    stmt = (update(shadow).where(shadow.c.id == bindparam('row_id'))
+            .values({name: bindparam(f'new_{name}') for name in retype}))
+    records = []
+    for row in rows:
+        record = _convert(row, retype)
+        records.append(dict({f'new_{name}': record[name] for name in retype}, row_id=record['id']))
+    connection.execute(stmt, records)
+
+
+def _create_mirror_triggers(connection, table_name, shadow_name, mirrored_name, columns):
+    table, shadow, mirrored = _quote(table_name), _quote(shadow_name), _quote(mirrored_name)
+    names = ', '.join(_quote(name) for name in columns)
+    new_values = ', '.join(f'NEW.{_quote(name)}' for name in columns)
+    remember = f'INSERT OR IGNORE INTO {mirrored} (id) VALUES (NEW.id);'
+    for event, body in (
+        ('INSERT', f'INSERT OR REPLACE INTO {shadow} ({names}) VALUES ({new_values}); {remember}'),
+        ('UPDATE', f'DELETE FROM {shadow} WHERE id = OLD.id; '
+                   f'INSERT OR REPLACE INTO {shadow} ({names}) VALUES ({new_values}); {remember}'),
+        ('DELETE', f'DELETE FROM {shadow} WHERE id = OLD.id;'),
+    ):
+        trigger = _quote(f'_{table_name}_mirror_{event.lower()}')
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        connection.execute(text(f'CREATE TRIGGER {trigger} AFTER {event} ON {table} BEGIN {body} END'))
+
+
+def _drop_mirror_triggers(connection, table_name):
+    for event in ('insert', 'update', 'delete'):
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {_quote(f"_{table_name}_mirror_{event}")}'))
@@ -0,0 +1,134 @@
+# File: app/models/table_import.py
+
+import csv
+import time
+import logging
+from sqlalchemy import insert
+from app import db
+from .column_types import column_type_name, coerce_value
+
+# Errors kept per import; the rest are only counted.
+MAX_ERRORS = 100
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows_imported = 0
+        self.rows_failed = 0
+        self.batches = 0
+        self.errors = []
+        self.errors_omitted = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows_imported / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, first_line, last_line, message):
+        if len(self.errors) >= MAX_ERRORS:
+            self.errors_omitted += 1
+            return
+        self.errors.append({'first_line': first_line, 'last_line': last_line, 'message': message})
+
+    def to_dict(self):
+        return {
+            'rows_imported': self.rows_imported,
+            'rows_failed': self.rows_failed,
+            'batches': self.batches,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors,
+            'errors_omitted': self.errors_omitted
+        }
+
+
+def import_csv(Table, binary_stream, batch_size=1000, on_batch=None):
+    """
+    Streams a CSV upload into a dynamic table.
+
+    Values are coerced using the column types from DynamicTable.schema, and
+    rows are inserted with one executemany INSERT per batch. Each batch is
+    committed on its own, so a bad batch is rolled back and reported without
+    discarding the others. Records containing bytes that are not valid UTF-8
+    are reported and skipped; errors give the file lines a record spans.
+    on_batch, if given, is called with the number of rows inserted inside
+    each batch's transaction, so bookkeeping commits exactly with the rows it
+    describes. Raises ValueError if the header row is not valid UTF-8 or does
+    not match the table.
+    """
+    result = ImportResult()
+    invalid_lines = {}
+    reader = csv.reader(_decoded_lines(binary_stream, invalid_lines))
+
+    headers = next(reader, None)
+    if not headers:
+        raise ValueError('The uploaded file is empty')
+    if invalid_lines:
+        raise ValueError(f'The header row is {invalid_lines[min(invalid_lines)]}')
+    unknown = [header for header in headers if header not in Table.c]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    types = [column_type_name(Table, header) for header in headers]
+
+    batch = []
+    first_line = last_line = reader.line_num
+    for row in reader:
+        # A quoted value may span several lines of the file.
+        start_line, last_line = last_line + 1, reader.line_num
+        if not batch:
+            first_line = start_line
+        try:
+            if invalid_lines:
+                reasons = [invalid_lines.pop(line) for line in range(start_line, last_line + 1)
+                           if line in invalid_lines]
+                if reasons:
+                    raise ValueError(reasons[0])
+            if len(row) != len(headers):
+                raise ValueError(f'expected {len(headers)} values, got {len(row)}')
+            batch.append({header: coerce_value(type_name, value)
+                          for header, type_name, value in zip(headers, types, row)})
+        except ValueError as e:
+            result.rows_failed += 1
+            result.add_error(start_line, last_line, str(e))
+
+        if len(batch) >= batch_size:
+            _insert_batch(Table, batch, first_line, last_line, result, on_batch)
+            batch = []
+
+    if batch:
+        _insert_batch(Table, batch, first_line, last_line, result, on_batch)
+
+    result.elapsed = time.monotonic() - result.started
+    logging.info(f"Imported {result.rows_imported} rows into {Table.name} "
+                 f"({result.rows_per_second:.0f} rows/sec, {result.rows_failed} failed)")
+    return result
+
+
+def _decoded_lines(binary_stream, invalid_lines):
+    # Undecodable bytes are kept as surrogates rather than dropping the line,
+    # so the CSV structure survives and the whole record can be rejected;
+    # invalid_lines maps their line numbers to the reason.
+    for line_number, raw in enumerate(binary_stream, start=1):
+        try:
+            line = raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            invalid_lines[line_number] = f'not valid UTF-8 ({e.reason} at byte {e.start} of line {line_number})'
+            line = raw.decode('utf-8', 'surrogateescape')
+        yield line.lstrip('\ufeff') if line_number == 1 else line
+
+
+def _insert_batch(Table, rows, first_line, last_line, result, on_batch=None):
+    result.batches += 1
+    try:
+        db.session.execute(insert(Table), rows)
+        if on_batch is not None:
+            on_batch(len(rows))
+        db.session.commit()
+        result.rows_imported += len(rows)
+    except Exception as e:
+        db.session.rollback()
+        message = str(getattr(e, 'orig', e))
+        result.rows_failed += len(rows)
+        result.add_error(first_line, last_line, message)
+        logging.error(f"Import batch {result.batches} into {Table.name} failed: {message}")
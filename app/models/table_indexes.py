@@ -0,0 +1,196 @@
+# File: app/models/table_indexes.py
+
+import hashlib
+import logging
+from sqlalchemy import Index, MetaData, Table, inspect, text
+from app import db
+from .dynamic_table import DynamicTable
+
+# PostgreSQL truncates identifiers longer than this.
+MAX_NAME_LENGTH = 63
+MAX_INDEX_COLUMNS = 8
+
+# Every core-dependent table is joined and filtered on core_uuid.
+CORE_UUID_INDEX_COLUMNS = ['core_uuid']
+
+
+def index_name(table_name, columns):
+    name = f"ix_{table_name}_{'_'.join(columns)}"
+    if len(name) > MAX_NAME_LENGTH:
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+        name = f'{name[:MAX_NAME_LENGTH - 9]}_{digest}'
+    return name
+
+
+def default_indexes(table_name, is_independent):
+    """Index definitions every new dynamic table starts with."""
+    if is_independent:
+        return []
+    return [{'name': index_name(table_name, CORE_UUID_INDEX_COLUMNS),
+             'columns': list(CORE_UUID_INDEX_COLUMNS), 'unique': False}]
+
+
+def normalize_index(table_name, column_names, spec, existing=()):
+    """
+    Validates an index spec ({'columns': [...], 'unique': bool}, or a bare
+    list of columns) against column_names and returns the definition to
+    store. Raises ValueError on bad input or duplicates of existing indexes.
+    """
+    if isinstance(spec, (list, tuple)):
+        spec = {'columns': spec}
+    if not isinstance(spec, dict):
+        raise ValueError('An index needs a list of columns')
+    columns = spec.get('columns')
+    if isinstance(columns, str):
+        columns = [name.strip() for name in columns.split(',') if name.strip()]
+    if not columns or not isinstance(columns, list):
+        raise ValueError('An index needs at least one column')
+    if len(columns) > MAX_INDEX_COLUMNS:
+        raise ValueError(f'An index can cover at most {MAX_INDEX_COLUMNS} columns')
+    if len(set(columns)) != len(columns):
+        raise ValueError('An index cannot list a column twice')
+    unknown = [name for name in columns if name not in column_names]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    definition = {'name': index_name(table_name, columns), 'columns': columns,
+                  'unique': bool(spec.get('unique', False))}
+    for index in existing:
+        if index['name'] == definition['name'] or index['columns'] == columns:
+            raise ValueError(f"An index on ({', '.join(columns)}) already exists")
+    return definition
+
+
+def surviving_indexes(indexes, column_names):
+    """Drops index definitions that reference columns no longer present."""
+    return [index for index in indexes if all(name in column_names for name in index['columns'])]
+
+
+def _quote(name):
+    return db.engine.dialect.identifier_preparer.quote(name)
+
+
+def _is_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def build_index(table, definition):
+    return Index(definition['name'], *[table.c[name] for name in definition['columns']],
+                 unique=definition['unique'])
+
+
+def create_table_index(table, definition):
+    """
+    Creates one declared index on table. On PostgreSQL the index is built
+    CONCURRENTLY on an autocommit connection, so writers are not blocked;
+    other backends use a plain CREATE INDEX.
+    """
+    if _is_postgresql():
+        columns = ', '.join(_quote(name) for name in definition['columns'])
+        unique = 'UNIQUE ' if definition['unique'] else ''
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as autocommit:
+            autocommit.execute(text(
+                f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {_quote(definition['name'])} "
+                f"ON {_quote(table.name)} ({columns})"
+            ))
+        return
+    with db.engine.begin() as connection:
+        build_index(table, definition).create(connection, checkfirst=True)
+
+
+def _drop_table_index(name):
+    if _is_postgresql():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as autocommit:
+            autocommit.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}'))
+    else:
+        with db.engine.begin() as connection:
+            connection.execute(text(f'DROP INDEX IF EXISTS {_quote(name)}'))
+
+
+def _dynamic_table(table_name):
+    dynamic_table = DynamicTable.query.filter_by(table_name=table_name).first()
+    if dynamic_table is None:
+        raise ValueError(f"Table '{table_name}' does not exist")
+    return dynamic_table
+
+
+def list_indexes(table_name):
+    """
+    Returns the declared indexes of a dynamic table, each with a 'built' flag
+    telling whether the index currently exists in the database.
+    """
+    dynamic_table = _dynamic_table(table_name)
+    built = {index['name'] for index in inspect(db.engine).get_indexes(table_name)}
+    return [dict(index, built=index['name'] in built) for index in dynamic_table.indexes or []]
+
+
+def add_index(table_name, spec):
+    """
+    Declares and builds an index on a dynamic table and returns its
+    definition. Raises ValueError if the spec is invalid.
+    """
+    from .dynamic_tables import get_table_class, invalidate_table
+    dynamic_table = _dynamic_table(table_name)
+    table = get_table_class(table_name)
+    indexes = list(dynamic_table.indexes or [])
+    definition = normalize_index(table_name, [column.name for column in table.columns], spec, indexes)
+
+    # Release the session's read transaction before DDL on another connection.
+    db.session.commit()
+    create_table_index(table, definition)
+    dynamic_table.indexes = indexes + [definition]
+    db.session.commit()
+    invalidate_table(table_name)
+    logging.info(f"Created index {definition['name']} on {table_name}")
+    return definition
+
+
+def remove_index(table_name, name):
+    """
+    Drops a declared index. Returns False if no index with that name is
+    declared on the table.
+    """
+    from .dynamic_tables import invalidate_table
+    dynamic_table = _dynamic_table(table_name)
+    indexes = list(dynamic_table.indexes or [])
+    remaining = [index for index in indexes if index['name'] != name]
+    if len(remaining) == len(indexes):
+        return False
+
+    db.session.commit()
+    _drop_table_index(name)
+    dynamic_table.indexes = remaining
+    db.session.commit()
+    invalidate_table(table_name)
+    logging.info(f"Dropped index {name} from {table_name}")
+    return True
+
+
+def sync_indexes(table_names):
+    """
+    Builds any declared index that is missing from the database, adding the
+    default core_uuid index to tables that do not declare one yet. Returns
+    the names of the indexes created.
+    """
+    from .dynamic_tables import invalidate_table
+    created = []
+    for dynamic_table in DynamicTable.query.filter(DynamicTable.table_name.in_(table_names)).all():
+        indexes = list(dynamic_table.indexes or [])
+        declared = {tuple(index['columns']) for index in indexes}
+        for index in default_indexes(dynamic_table.table_name, dynamic_table.is_independent):
+            if tuple(index['columns']) not in declared:
+                indexes.append(index)
+        if indexes != (dynamic_table.indexes or []):
+            dynamic_table.indexes = indexes
+            db.session.commit()
+
+        built = {index['name'] for index in inspect(db.engine).get_indexes(dynamic_table.table_name)}
+        missing = [index for index in indexes if index['name'] not in built]
+        if not missing:
+            continue
+        table = Table(dynamic_table.table_name, MetaData(), autoload_with=db.engine)
+        for index in missing:
+            create_table_index(table, index)
+            created.append(index['name'])
+        invalidate_table(dynamic_table.table_name)
+    return created
@@ -0,0 +1,189 @@
+# File: app/models/table_query.py
+
+import base64
+import json
+from sqlalchemy import and_, or_
+from flask import current_app
+from .column_types import column_type_name, coerce_value, UNORDERED_TYPES
+
+FILTER_PREFIX = 'filter_'
+
+
+class TableQuery:
+    """
+    Validated paging, sorting and filtering options for a dynamic table.
+
+    Pagination is keyset based: the cursor carries the sort value and id of
+    the last row on the previous page, so fetching page N costs the same as
+    fetching page 1 when the sort column is indexed.
+    """
+
+    def __init__(self, Table, sort='id', direction='asc', filters=None, page_size=None, cursor=None):
+        self.Table = Table
+        self.columns = allowed_columns(Table)
+        self.sort = sort
+        self.direction = direction
+        self.filters = filters or {}
+        self.page_size = page_size
+        self.cursor = cursor
+
+    @classmethod
+    def from_args(cls, Table, args):
+        """
+        Builds a TableQuery from request arguments, validating column names
+        against the table's DynamicTable.schema. Raises ValueError on bad input.
+        """
+        allowed = allowed_columns(Table)
+
+        sort = args.get('sort', 'id')
+        if sort not in allowed:
+            raise ValueError(f"Cannot sort by unknown column '{sort}'")
+
+        direction = args.get('direction', 'asc')
+        if direction not in ('asc', 'desc'):
+            raise ValueError(f"Invalid sort direction '{direction}'")
+
+        filters = {}
+        for key, value in args.items():
+            if not key.startswith(FILTER_PREFIX) or value == '':
+                continue
+            column_name = key[len(FILTER_PREFIX):]
+            if column_name not in allowed:
+                raise ValueError(f"Cannot filter by unknown column '{column_name}'")
+            filters[column_name] = value
+
+        default_size = current_app.config['TABLE_PAGE_SIZE']
+        max_size = current_app.config['TABLE_MAX_PAGE_SIZE']
+        try:
+            page_size = int(args.get('page_size', default_size))
+        except ValueError:
+            raise ValueError('Page size must be a number')
+        page_size = max(1, min(page_size, max_size))
+
+        cursor = _coerce_cursor(Table, sort, decode_cursor(args['after'])) if args.get('after') else None
+        return cls(Table, sort=sort, direction=direction, filters=filters, page_size=page_size, cursor=cursor)
+
+    def _coerce(self, column_name, value):
+        # Compare in the column's own type so numbers and dates match and
+        # range-scan natively rather than as strings.
+        try:
+            return coerce_value(column_type_name(self.Table, column_name), value)
+        except ValueError as e:
+            raise ValueError(f"Filter value for '{column_name}': {e}")
+
+    def _filter_clauses(self):
+        clauses = []
+        for column_name, value in self.filters.items():
+            column = self.Table.c[column_name]
+            if value.endswith('*') and _python_type(column) is str:
+                # A trailing '*' is a prefix match, which can still use an index.
+                clauses.append(column.startswith(value[:-1], autoescape=True))
+            else:
+                clauses.append(column == self._coerce(column_name, value))
+        return clauses
+
+    def _keyset_clause(self):
+        sort_value, last_id = self.cursor
+        id_column = self.Table.c.id
+        if self.sort == 'id':
+            return id_column > last_id if self.direction == 'asc' else id_column < last_id
+
+        column = self.Table.c[self.sort]
+        # NULLs sort first when ascending and last when descending.
+        if self.direction == 'asc':
+            if sort_value is None:
+                return or_(and_(column.is_(None), id_column > last_id), column.isnot(None))
+            return or_(column > sort_value, and_(column == sort_value, id_column > last_id))
+        if sort_value is None:
+            return and_(column.is_(None), id_column < last_id)
+        return or_(column < sort_value, and_(column == sort_value, id_column < last_id), column.is_(None))
+
+    def _order_by(self):
+        id_column = self.Table.c.id
+        if self.sort == 'id':
+            return [id_column.asc() if self.direction == 'asc' else id_column.desc()]
+        column = self.Table.c[self.sort]
+        if self.direction == 'asc':
+            return [column.asc().nulls_first(), id_column.asc()]
+        return [column.desc().nulls_last(), id_column.desc()]
+
+    def apply(self, stmt):
+        """
+        Adds filters, the keyset predicate, ORDER BY and LIMIT to stmt. One
+        extra row is fetched so callers can tell whether a next page exists.
+        """
+        clauses = self._filter_clauses()
+        if self.cursor is not None:
+            clauses.append(self._keyset_clause())
+        if clauses:
+            stmt = stmt.where(*clauses)
+        return stmt.order_by(*self._order_by()).limit(self.page_size + 1)
+
+    def paginate(self, rows):
+        """
+        Trims the extra look-ahead row from a list of row mappings and returns
+        (rows, next_cursor). next_cursor is None on the last page.
+        """
+        if len(rows) <= self.page_size:
+            return rows, None
+        rows = rows[:self.page_size]
+        return rows, encode_cursor(rows[-1][self.sort], rows[-1]['id'])
+
+    def cache_key(self):
+        """A hashable, order-independent description of the rows this query selects."""
+        return (self.sort, self.direction, tuple(sorted(self.filters.items())), self.page_size, self.cursor)
+
+    def to_args(self, **overrides):
+        args = {'sort': self.sort, 'direction': self.direction, 'page_size': self.page_size}
+        args.update({f'{FILTER_PREFIX}{name}': value for name, value in self.filters.items()})
+        args.update(overrides)
+        return args
+
+
+def allowed_columns(Table):
+    """
+    Returns the columns that may be sorted and filtered on: the id, the
+    orderable columns declared in DynamicTable.schema and core_uuid when
+    present.
+    """
+    schema = Table.info.get('dynamic_table', {}).get('schema', {})
+    allowed = ['id'] + [name for name, type_name in schema.items()
+                        if name in Table.c and type_name not in UNORDERED_TYPES]
+    if 'core_uuid' in Table.c:
+        allowed.append('core_uuid')
+    return allowed
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _coerce_cursor(Table, sort, cursor):
+    # Converted up front, so a tampered cursor fails in from_args like any
+    # other bad argument rather than when the query runs.
+    sort_value, last_id = cursor
+    if sort_value in (None, ''):
+        return None, last_id
+    try:
+        return coerce_value(column_type_name(Table, sort), sort_value), last_id
+    except ValueError:
+        raise ValueError('Invalid page cursor')
+
+
+def encode_cursor(sort_value, last_id):
+    payload = json.dumps([sort_value, last_id], default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        sort_value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        # Cursors only ever carry a scalar, and are part of cache keys.
+        if isinstance(sort_value, (list, dict)):
+            raise ValueError(sort_value)
+        return sort_value, int(last_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid page cursor')
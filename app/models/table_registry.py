@@ -0,0 +1,78 @@
+# File: app/models/table_registry.py
+
+import threading
+import logging
+
+
+class TableRegistry:
+    """
+    Process-wide cache of reflected dynamic tables.
+
+    Entries are keyed by table name and stamped with the schema generation
+    they were reflected under. Any DDL bumps the generation, so stale entries
+    are never served once invalidate() has been called.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._generations = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, table_name, loader):
+        """
+        Returns the cached entry for table_name, calling loader() to build it
+        on a miss. A loader result of None is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if entry is not None and entry[0] == self.generation_for(table_name):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation_for(table_name)
+
+        # Reflection runs outside the lock so a slow catalog query does not
+        # stall readers of other tables.
+        value = loader()
+        if value is None:
+            return None
+
+        with self._lock:
+            # Only store the result if no DDL happened while we were loading.
+            if generation == self.generation_for(table_name):
+                self._entries[table_name] = (generation, value)
+        return value
+
+    def generation_for(self, table_name):
+        with self._lock:
+            return (self.generation, self._generations.get(table_name, 0))
+
+    def invalidate(self, table_name=None):
+        """
+        Drops the cached entry for table_name, or every entry when no name is
+        given, and bumps the schema generation.
+        """
+        with self._lock:
+            if table_name is None:
+                self.generation += 1
+                self._entries.clear()
+                logging.info(f"Table registry cleared (generation {self.generation})")
+            else:
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+                self._entries.pop(table_name, None)
+                logging.info(f"Table registry invalidated {table_name}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'generation': self.generation,
+                'tables': sorted(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+table_registry = TableRegistry()
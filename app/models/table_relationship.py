@@ -1,13 +1,23 @@
 # File: app/models/table_relationship.py
 
+from sqlalchemy import select, insert, update, delete, or_
 from app import db
 
 class TableRelationship(db.Model):
+    """
+    One parent -> child edge of a SchemaDefinition, materialized so reverse
+    lookups ("which schemas reference table X") are a single indexed query.
+    Rows are rebuilt by sync_schema_edges() whenever a schema version is
+    written. The table ids are filled in when the names match a dynamic table.
+    """
     __tablename__ = 'table_relationships'
 
     id = db.Column(db.Integer, primary_key=True)
-    parent_table_id = db.Column(db.Integer, db.ForeignKey('dynamic_tables.id'), nullable=False)
-    child_table_id = db.Column(db.Integer, db.ForeignKey('dynamic_tables.id'), nullable=False)
+    schema_id = db.Column(db.Integer, db.ForeignKey('schema_definitions.id'), index=True)
+    parent_name = db.Column(db.String(64), index=True)
+    child_name = db.Column(db.String(64), index=True)
+    parent_table_id = db.Column(db.Integer, db.ForeignKey('dynamic_tables.id'))
+    child_table_id = db.Column(db.Integer, db.ForeignKey('dynamic_tables.id'))
     relationship_type = db.Column(db.String(20), nullable=False)  # e.g., 'one-to-many', 'many-to-many'
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
@@ -16,4 +26,84 @@ class TableRelationship(db.Model):
     child_table = db.relationship('DynamicTable', foreign_keys=[child_table_id], backref=db.backref('parent_relationships', lazy='dynamic'))
 
     def __repr__(self):
-        return f'<TableRelationship {self.parent_table.table_name} -> {self.child_table.table_name}>'
+        return f'<TableRelationship {self.parent_name} -> {self.child_name}>'
+
+def sync_schema_edges(schema):
+    """
+    Replaces the materialized edges of schema with its current relationships.
+    The schema must have been flushed; the caller commits.
+    """
+    from .dynamic_table import DynamicTable
+
+    edges = TableRelationship.__table__
+    db.session.execute(delete(edges).where(edges.c.schema_id == schema.id))
+
+    relationships = [relationship for relationship in schema.get_relationships()
+                     if relationship.get('parent') and relationship.get('child')]
+    if not relationships:
+        return
+
+    names = {relationship['parent'] for relationship in relationships} | {relationship['child'] for relationship in relationships}
+    table_ids = dict(db.session.execute(
+        select(DynamicTable.table_name, DynamicTable.id).where(DynamicTable.table_name.in_(names))
+    ).all())
+    db.session.execute(insert(edges), [{
+        'schema_id': schema.id,
+        'parent_name': relationship['parent'],
+        'child_name': relationship['child'],
+        'parent_table_id': table_ids.get(relationship['parent']),
+        'child_table_id': table_ids.get(relationship['child']),
+        'relationship_type': relationship.get('type', 'unknown')[:20]
+    } for relationship in relationships])
+
+def link_table_edges(dynamic_table):
+    """
+    Fills in table ids on existing edges that name a newly created dynamic
+    table. The caller commits.
+    """
+    edges = TableRelationship.__table__
+    db.session.execute(update(edges).where(edges.c.parent_name == dynamic_table.table_name)
+                       .values(parent_table_id=dynamic_table.id))
+    db.session.execute(update(edges).where(edges.c.child_name == dynamic_table.table_name)
+                       .values(child_table_id=dynamic_table.id))
+
+def delete_schema_edges(schema_id):
+    edges = TableRelationship.__table__
+    db.session.execute(delete(edges).where(edges.c.schema_id == schema_id))
+
+def schema_join_columns(table_name):
+    """
+    Returns {column name: ['<schema> v<version>', ...]} for the columns of
+    table_name that schema queries join on: <parent>_id where table_name is
+    the child of a relationship, and <child>_id where it is the parent.
+    """
+    from .schema_definition import SchemaDefinition
+
+    rows = db.session.execute(
+        select(TableRelationship.parent_name, TableRelationship.child_name,
+               SchemaDefinition.name, SchemaDefinition.version)
+        .join(SchemaDefinition, SchemaDefinition.id == TableRelationship.schema_id)
+        .where(or_(TableRelationship.parent_name == table_name, TableRelationship.child_name == table_name))
+        .order_by(SchemaDefinition.name, SchemaDefinition.version)
+    ).all()
+    columns = {}
+    for parent_name, child_name, schema_name, version in rows:
+        column = f'{parent_name}_id' if child_name == table_name else f'{child_name}_id'
+        label = f'{schema_name} v{version}'
+        if label not in columns.setdefault(column, []):
+            columns[column].append(label)
+    return columns
+
+def schemas_referencing(table_name):
+    """
+    Returns the SchemaDefinitions with at least one relationship whose parent
+    or child is table_name, newest version first.
+    """
+    from .schema_definition import SchemaDefinition
+
+    schema_ids = select(TableRelationship.schema_id).where(
+        or_(TableRelationship.parent_name == table_name, TableRelationship.child_name == table_name)
+    )
+    return SchemaDefinition.query.filter(SchemaDefinition.id.in_(schema_ids)).order_by(
+        SchemaDefinition.name, SchemaDefinition.version.desc()
+    ).all()
@@ -0,0 +1,139 @@
+# File: app/models/table_statistics.py
+
+import logging
+from datetime import datetime
+from sqlalchemy import select, update, insert, func, text, event, table
+from app import db
+from .core_table import CoreTable
+from .search import CORE_TABLE
+from .query_cache import query_cache
+
+class TableStatistics(db.Model):
+    """
+    Precomputed row counts and sizes for dynamic tables. The write paths keep
+    row_count and last_modified current with record_change(); the
+    reconciliation job recounts from scratch and refreshes avg_row_bytes.
+
+    generation increases by one with every change to a table's rows or
+    columns and is never reset, so it can version cached responses. The
+    core table has a row of its own, kept by the CoreTable mapper events.
+    """
+    __tablename__ = 'table_statistics'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    row_count = db.Column(db.BigInteger, default=0, nullable=False)
+    avg_row_bytes = db.Column(db.Integer, default=0, nullable=False)
+    last_modified = db.Column(db.DateTime)
+    reconciled_at = db.Column(db.DateTime)
+    generation = db.Column(db.BigInteger, default=0, nullable=False)
+
+    @property
+    def size_bytes(self):
+        return self.row_count * self.avg_row_bytes
+
+    def to_dict(self):
+        return {
+            'table_name': self.table_name,
+            'row_count': self.row_count,
+            'size_bytes': self.size_bytes,
+            'last_modified': self.last_modified,
+            'reconciled_at': self.reconciled_at,
+            'generation': self.generation
+        }
+
+    def __repr__(self):
+        return f'<TableStatistics {self.table_name}: {self.row_count} rows>'
+
+def _change(table_name, delta=0):
+    stats = TableStatistics.__table__
+    return (update(stats)
+            .where(stats.c.table_name == table_name)
+            .values(row_count=stats.c.row_count + delta,
+                    generation=stats.c.generation + 1,
+                    last_modified=datetime.utcnow()))
+
+def record_change(table_name, delta=0, connection=None):
+    """
+    Adjusts the row count of table_name by delta, bumps its generation and
+    stamps last_modified. Runs in the caller's transaction (the session's,
+    or connection's when given), so the numbers commit with the data.
+    A table without a statistics row gets one, counted from scratch.
+    """
+    executor = connection or db.session
+    if executor.execute(_change(table_name, delta)).rowcount == 0:
+        row_count = executor.execute(select(func.count()).select_from(table(table_name))).scalar()
+        executor.execute(insert(TableStatistics.__table__).values(
+            table_name=table_name, row_count=row_count, avg_row_bytes=0, generation=1,
+            last_modified=datetime.utcnow()
+        ))
+    query_cache.invalidate(table_name)
+
+def table_generation(table_name):
+    """Returns the generation of table_name, or None if it has no statistics row."""
+    return table_generations([table_name]).get(table_name, (None, None))[0]
+
+def table_generations(table_names):
+    """
+    Returns {table_name: (generation, last_modified)} for the tables that
+    have statistics, in one primary-key lookup.
+    """
+    stats = TableStatistics.__table__
+    rows = db.session.execute(
+        select(stats.c.table_name, stats.c.generation, stats.c.last_modified)
+        .where(stats.c.table_name.in_(list(table_names)))
+    ).all()
+    return {name: (generation, last_modified) for name, generation, last_modified in rows}
+
+@event.listens_for(CoreTable, 'after_insert')
+@event.listens_for(CoreTable, 'after_update')
+@event.listens_for(CoreTable, 'after_delete')
+def _record_core_change(mapper, connection, target):
+    # Table views embed core fields, so core writes version them too.
+    query_cache.invalidate(CORE_TABLE)
+    if connection.execute(_change(CORE_TABLE)).rowcount == 0:
+        connection.execute(insert(TableStatistics.__table__).values(
+            table_name=CORE_TABLE, row_count=0, avg_row_bytes=0, generation=1, last_modified=datetime.utcnow()
+        ))
+
+def _measure_size(table_name):
+    """
+    Returns the on-disk size of table_name in bytes, or None when the backend
+    cannot report it.
+    """
+    dialect = db.engine.dialect.name
+    try:
+        if dialect == 'postgresql':
+            return db.session.execute(text('SELECT pg_total_relation_size(:name)'), {'name': table_name}).scalar()
+        if dialect == 'sqlite':
+            return db.session.execute(text('SELECT SUM(pgsize) FROM dbstat WHERE name = :name'), {'name': table_name}).scalar()
+    except Exception:
+        db.session.rollback()
+    return None
+
+def reconcile_statistics(table_names):
+    """
+    Recounts every table in table_names and rewrites its statistics row.
+    Intended for a periodic job; returns the refreshed TableStatistics rows.
+    """
+    from .dynamic_tables import get_table_class
+
+    refreshed = []
+    for table_name in table_names:
+        table = get_table_class(table_name)
+        if table is None:
+            continue
+        row_count = db.session.execute(select(func.count()).select_from(table)).scalar()
+        size = _measure_size(table_name)
+
+        stats = db.session.get(TableStatistics, table_name)
+        if stats is None:
+            stats = TableStatistics(table_name=table_name)
+            db.session.add(stats)
+        stats.row_count = row_count
+        if size is not None and row_count:
+            stats.avg_row_bytes = size // row_count
+        stats.reconciled_at = datetime.utcnow()
+        db.session.commit()
+        refreshed.append(stats)
+        logging.info(f"Reconciled statistics for {table_name}: {row_count} rows")
+    return refreshed
@@ -0,0 +1,120 @@
+# File: app/models/table_writes.py
+
+from datetime import datetime
+from app import db
+from .column_types import column_type_name, coerce_value, coerce_row
+from .statement_cache import statement_cache, bind_values, ID_PARAM, IDS_PARAM
+
+# Keeps IN lists under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 500
+
+READ_ONLY_COLUMNS = ['id', 'created_at', 'updated_at']
+
+
+def writable_columns(Table):
+    return [column.name for column in Table.columns if column.name not in READ_ONLY_COLUMNS]
+
+
+def existing_ids(Table, ids):
+    """
+    Returns the subset of ids present in Table, using bounded IN queries.
+    """
+    ids = list(ids)
+    found = set()
+    stmt = statement_cache.get(Table, 'select_ids_in')
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+        found.update(db.session.execute(stmt, {IDS_PARAM: chunk}).scalars())
+    return found
+
+
+def insert_entry(Table, values):
+    """
+    Validates and coerces values against the writable columns and inserts a
+    row. Returns the new id. Raises ValueError on unknown columns or bad values.
+    """
+    allowed = writable_columns(Table)
+    unknown = [key for key in values if key not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    row = coerce_row(Table, values)
+    now = datetime.utcnow()
+    row.update(created_at=now, updated_at=now)
+    result = db.session.execute(statement_cache.get(Table, 'insert', row), bind_values(row))
+    return result.inserted_primary_key[0]
+
+
+def delete_entry(Table, entry_id):
+    """
+    Deletes the row with entry_id. Returns False if it did not exist.
+    """
+    result = db.session.execute(statement_cache.get(Table, 'delete_by_id'), {ID_PARAM: entry_id})
+    return result.rowcount > 0
+
+
+def _entry_id(entry):
+    # Accepts ints and numeric strings such as "5"; booleans and fractional
+    # numbers are not ids.
+    if not isinstance(entry, dict):
+        return None
+    value = entry.get('id')
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def bulk_update(Table, entries):
+    """
+    Applies a list of {'id': ..., column: value} dicts to Table.
+
+    Keys are validated against the reflected columns once, target rows are
+    looked up with batched IN queries, and rows sharing the same set of
+    changed columns are written with a single executemany UPDATE. Returns one
+    {'id', 'status', 'error'} dict per entry, in input order; status is one of
+    'updated', 'not_found' or 'invalid'. The caller owns the transaction.
+    """
+    allowed = set(writable_columns(Table))
+    types = {name: column_type_name(Table, name) for name in allowed}
+
+    statuses = []
+    pending = []
+    for entry in entries:
+        entry_id = _entry_id(entry)
+        if entry_id is None:
+            statuses.append({'id': entry.get('id') if isinstance(entry, dict) else None,
+                             'status': 'invalid', 'error': 'Each entry needs an integer id'})
+            continue
+        status = {'id': entry_id, 'status': 'updated', 'error': None}
+        statuses.append(status)
+
+        unknown = [key for key in entry if key != 'id' and key not in allowed]
+        if unknown:
+            status.update(status='invalid', error=f"Unknown columns: {', '.join(unknown)}")
+            continue
+        try:
+            values = {key: coerce_value(types[key], value) for key, value in entry.items() if key != 'id'}
+        except ValueError as e:
+            status.update(status='invalid', error=str(e))
+            continue
+        pending.append((status, values))
+
+    found = existing_ids(Table, [status['id'] for status, _ in pending])
+
+    now = datetime.utcnow()
+    groups = {}
+    for status, values in pending:
+        if status['id'] not in found:
+            status.update(status='not_found', error='Entry not found')
+            continue
+        values['updated_at'] = now
+        params = bind_values(values)
+        params[ID_PARAM] = status['id']
+        groups.setdefault(tuple(sorted(values)), []).append(params)
+
+    for keys, params in groups.items():
+        db.session.execute(statement_cache.get(Table, 'update_by_id', keys), params)
+
+    return statuses
@@ -3,35 +3,73 @@
 from app import db
 from flask_login import UserMixin
 from werkzeug.security import check_password_hash
+from .user_table_grant import UserTableGrant
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
-    accessible_tables = db.Column(db.String(256))
+    accessible_tables = db.Column(db.String(256))  # Legacy, superseded by UserTableGrant
     permissions = db.Column(db.String(64))
     is_admin = db.Column(db.Boolean, default=False)
+    permissions_version = db.Column(db.Integer, default=0, nullable=False)
 
     owned_tables = db.relationship('DynamicTable', back_populates='table_owner')
+    table_grants = db.relationship('UserTableGrant', lazy='dynamic', cascade='all, delete-orphan')
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def permission_set(self):
+        from .permissions import get_permissions
+        return get_permissions(self)
+
     def can_access_table(self, table_name):
-        if self.is_admin:
-            return True
-        accessible_tables = self.get_accessible_tables()
-        owned_tables = [table.table_name for table in self.owned_tables]
-        return table_name in accessible_tables or table_name in owned_tables
+        return self.permission_set().can_access(table_name)
 
     def get_accessible_tables(self):
-        return self.accessible_tables.split(',') if self.accessible_tables else []
+        return sorted(self.permission_set().granted_tables)
+
+    def get_permissions(self):
+        return sorted(self.permission_set().verbs)
 
     def can_view(self, table_name):
-        return self.can_access_table(table_name) and 'view' in self.permissions.split(',')
+        return self.can_access_table(table_name) and self.permission_set().has('view')
 
     def can_edit(self, table_name):
-        return self.can_access_table(table_name) and 'edit' in self.permissions.split(',')
+        return self.can_access_table(table_name) and self.permission_set().has('edit')
+
+    def can_alter(self, table_name):
+        return self.is_admin or table_name in self.permission_set().owned_tables
 
     def can_create_tables(self):
-        return self.is_admin or 'create' in self.permissions.split(',')
+        return self.is_admin or self.permission_set().has('create')
+
+    def grant_tables(self, table_names):
+        """
+        Grants access to table_names in addition to the current grants.
+        The caller must commit.
+        """
+        from .permissions import invalidate_permissions
+        current = set(self.permission_set().granted_tables)
+        for table_name in set(table_names) - current:
+            db.session.add(UserTableGrant(user_id=self.id, table_name=table_name))
+        invalidate_permissions(self)
+
+    def set_accessible_tables(self, table_names):
+        """
+        Replaces the user's table grants with table_names. The caller must commit.
+        """
+        from .permissions import invalidate_permissions
+        table_names = set(table_names)
+        current = set(self.permission_set().granted_tables)
+        if current - table_names:
+            self.table_grants.filter(UserTableGrant.table_name.in_(current - table_names)).delete(synchronize_session=False)
+        for table_name in table_names - current:
+            db.session.add(UserTableGrant(user_id=self.id, table_name=table_name))
+        invalidate_permissions(self)
+
+    def set_permissions(self, verbs):
+        from .permissions import invalidate_permissions
+        self.permissions = ','.join(verbs)
+        invalidate_permissions(self)
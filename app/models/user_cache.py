@@ -0,0 +1,49 @@
+# File: app/models/user_cache.py
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached, object_session
+from app import db
+from app.cache import LRUCache, on_commit
+from .user import User
+
+# Column snapshots of recently loaded users, keyed by id. Entries are dropped
+# whenever this process commits a change to the row; the TTL bounds how long
+# another worker's change can go unnoticed.
+user_cache = LRUCache(maxsize=1024, ttl=30)
+
+
+def init_user_cache(app):
+    user_cache.maxsize = app.config.get('USER_CACHE_SIZE', 1024)
+    user_cache.ttl = app.config.get('USER_CACHE_TTL', 30)
+
+
+def load_user(user_id):
+    """
+    Returns the User for user_id, attached to the current session. On a cache
+    hit the instance is rebuilt from the snapshot and merged without a query.
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+        return user
+
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def invalidate_user(user_id):
+    user_cache.delete(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _collect_changed_user(mapper, connection, target):
+    on_commit(object_session(target), 'user_cache_changed', [target.id], _invalidate_many, _invalidate_many)
+
+
+def _invalidate_many(user_ids):
+    for user_id in set(user_ids):
+        invalidate_user(user_id)
@@ -0,0 +1,13 @@
+# File: app/models/user_table_grant.py
+
+from app import db
+
+class UserTableGrant(db.Model):
+    __tablename__ = 'user_table_grants'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    table_name = db.Column(db.String(64), primary_key=True, index=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<UserTableGrant {self.user_id} -> {self.table_name}>'
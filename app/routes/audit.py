@@ -0,0 +1,79 @@
+# File: app/routes/audit.py
+
+from datetime import datetime, timedelta
+import click
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from app.models.audit import query_logs, archive_logs, read_archive
+from app.models.log import LogArchive
+
+bp = Blueprint('audit', __name__)
+
+def _parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or datetime")
+
+def _parse_int(value, name):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+
+@bp.route('/audit_log')
+@login_required
+def audit_log_query():
+    args = request.args
+    try:
+        table_name = args.get('table')
+        entry_id = _parse_int(args['entry_id'], 'entry_id') if args.get('entry_id') else None
+        user_id = _parse_int(args['user_id'], 'user_id') if args.get('user_id') else None
+        since = _parse_datetime(args['since'], 'since') if args.get('since') else None
+        until = _parse_datetime(args['until'], 'until') if args.get('until') else None
+        before_id = _parse_int(args['before'], 'before') if args.get('before') else None
+        page_size = _parse_int(args.get('page_size', current_app.config['TABLE_PAGE_SIZE']), 'page_size')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    page_size = max(1, min(page_size, current_app.config['TABLE_MAX_PAGE_SIZE']))
+
+    tables = None
+    if not current_user.is_admin:
+        if table_name and not current_user.can_access_table(table_name):
+            return jsonify({'error': 'Permission denied'}), 403
+        tables = sorted(current_user.permission_set().tables)
+
+    logs, next_before = query_logs(table_name=table_name, entry_id=entry_id, user_id=user_id,
+                                   since=since, until=until, before_id=before_id,
+                                   limit=page_size, tables=tables)
+    return jsonify({'logs': [log.to_dict() for log in logs], 'next_before': next_before})
+
+@bp.route('/audit_log/archives')
+@login_required
+def audit_log_archives():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    archives = LogArchive.query.with_entities(
+        LogArchive.id, LogArchive.period, LogArchive.first_log_id,
+        LogArchive.last_log_id, LogArchive.row_count, LogArchive.created_at
+    ).order_by(LogArchive.id.desc()).all()
+    return jsonify({'archives': [dict(archive._mapping) for archive in archives]})
+
+@bp.route('/audit_log/archives/<int:archive_id>')
+@login_required
+def audit_log_archive(archive_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Permission denied'}), 403
+
+    archive = LogArchive.query.get_or_404(archive_id)
+    return jsonify({'period': archive.period, 'logs': read_archive(archive)})
+
+@bp.cli.command('archive-logs')
+@click.option('--days', default=90, show_default=True, help='Archive log rows older than this many days.')
+@click.option('--batch-size', default=5000, show_default=True)
+def archive_logs_command(days, batch_size):
+    """Move old audit log rows into compressed archive partitions."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived = archive_logs(cutoff, batch_size=batch_size)
+    click.echo(f'Archived {archived} log rows older than {cutoff.isoformat()}')
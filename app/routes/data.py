@@ -1,17 +1,34 @@
 # File: app/routes/data.py
 
 import csv
+import json
+import click
+import zlib
 from io import StringIO
-from flask import send_file, make_response
+from flask import send_file, make_response, Response, stream_with_context, current_app
 from flask import Blueprint, render_template, flash, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
 from app import db
 from app.models.dynamic_tables import create_dynamic_table, get_table_class, get_all_dynamic_tables
-from app.models.log import Log
+from app.models.audit import audit_log
 from app.models.user import User
 from app.models.dynamic_table import DynamicTable
-from sqlalchemy import inspect, insert, select, update, Table, Column
+from sqlalchemy import inspect, select, Table, Column
 from app.models.core_table import CoreTable
+from app.models.table_query import TableQuery
+from app.models.table_import import import_csv
+from app.models.table_writes import bulk_update, insert_entry, delete_entry as delete_table_entry
+from app.models.table_statistics import record_change, reconcile_statistics, table_generations
+from app.models.query_cache import query_cache
+from app.models.statement_cache import statement_cache, bind_values, ID_PARAM
+from app.models.table_alter import alter_dynamic_table, get_alter_progress
+from app.models.column_types import column_type_name, coerce_row, format_value
+from app.models.table_indexes import list_indexes, add_index, remove_index, sync_indexes
+from app.models.core_records import dependent_tables, fetch_core_records
+from app.models.core_lookup import lookup_core_entries
+from app.models.core_cache import core_cache, get_many
+from app.models.search import CORE_TABLE
+from app.conditional import make_etag, not_modified, set_validators
 from sqlalchemy.orm import aliased
 import logging
 
@@ -26,11 +43,60 @@ from sqlalchemy.orm import aliased
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Core fields appended to CSV exports with ?include_core=1.
+EXPORT_CORE_COLUMNS = ['name', 'description']
+
+
+def _fetch_rows_with_core(Table, query, generation):
+    """
+    Fetches one page of a dynamic table described by query and returns
+    (columns, data, next_cursor), where data is a list of (row_dict, core_data)
+    pairs. The page itself comes from the query cache while the table is
+    still at generation (as read by _table_validators; None bypasses the
+    cache); core data for it comes from the shared core cache, which loads
+    any misses in a single IN query.
+    """
+    def load():
+        rows, next_cursor = query.paginate(db.session.execute(query.apply(select(Table))).mappings().all())
+        return [dict(row) for row in rows], next_cursor
+
+    columns = [column.name for column in Table.columns
+               if column.name not in ['created_at', 'updated_at']]  # Include 'id' in columns
+
+    # Access is all-or-nothing per table and is checked before this runs, so
+    # every user who may read the table shares the entry.
+    rows, next_cursor = query_cache.get_or_set(Table.name, generation, query.cache_key(), load)
+    cores = get_many(row['core_uuid'] for row in rows) if 'core_uuid' in Table.c else {}
+    data = []
+    for row in rows:
+        row_dict = {name: format_value(column_type_name(Table, name), row[name]) for name in columns}
+        data.append((row_dict, cores.get(row.get('core_uuid'), {})))
+    return columns, data, next_cursor
+
+def _table_validators(Table, *parts, with_core=True, per_user=True):
+    """
+    (etag, last_modified, generation) for a response built from Table's rows:
+    the validators cover its change generation, the core table's when the
+    response shows core fields, and parts; generation is Table's own, for
+    the query cache. Each is None when a table it depends on has no
+    statistics row, since that table's changes could not be told apart.
+    Per-user responses get no last_modified: it only reflects the data, so
+    If-Modified-Since would match after the user's permissions change.
+    """
+    names = [Table.name] + ([CORE_TABLE] if with_core and 'core_uuid' in Table.c else [])
+    generations = table_generations(names)
+    generation = generations.get(Table.name, (None, None))[0]
+    if len(generations) < len(names):
+        return None, None, generation
+    stamps = [generations[name] for name in names]
+    modified = [last_modified for _, last_modified in stamps if last_modified is not None]
+    etag = make_etag(Table.name, *[generation for generation, _ in stamps], *parts, per_user=per_user)
+    return etag, max(modified) if modified and not per_user else None, generation
 
 @bp.route('/view_table/<table_name>')
 @login_required
 def view_table(table_name):
-    print(f"Accessing view_table for table: {table_name}")
+    logger.debug(f"Accessing view_table for table: {table_name}")
     if not current_user.can_access_table(table_name):
         flash('You do not have permission to view this table.', 'error')
         return redirect(url_for('main.dashboard'))
@@ -41,67 +107,44 @@ def view_table(table_name):
         return redirect(url_for('main.dashboard'))
 
     try:
-        # Fetch data from the dynamic table
-        stmt = select(Table)
-        print(f"SQL Query: {stmt}")
-
-        result = db.session.execute(stmt)
-
-        # Print raw query result
-        raw_result = list(result)
-        print(f"Raw query result: {raw_result}")
-
-        data = []
-        columns = [column.name for column in Table.columns
-                   if column.name not in ['created_at', 'updated_at']]  # Include 'id' in columns
-
-        print(f"Columns for table {table_name}: {columns}")
-
-        for row in raw_result:
-            row_dict = {}
-            for i, column in enumerate(Table.columns):
-                if column.name in columns:
-                    row_dict[column.name] = str(row[i]) if row[i] is not None else ''
-
-            print(f"Processed row data: {row_dict}")
-
-            core_entry = None
-            if 'core_uuid' in row_dict and row_dict['core_uuid']:
-                core_entry = CoreTable.query.filter_by(uuid=row_dict['core_uuid']).first()
-                print(f"Core entry found: {core_entry}")
-
-            core_data = core_entry.to_dict() if core_entry else {}
-            print(f"Core data: {core_data}")
+        query = TableQuery.from_args(Table, request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('data.view_table', table_name=table_name))
 
-            data.append((row_dict, core_data))
+    user_permissions = current_user.get_permissions()
+    user_tables = current_user.get_accessible_tables()
+    etag, last_modified, generation = _table_validators(Table, query.cache_key(), user_permissions, user_tables)
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
 
+    try:
+        columns, data, next_cursor = _fetch_rows_with_core(Table, query, generation)
         core_columns = ['name', 'description']
+        is_independent = Table.info['dynamic_table']['is_independent']
 
-        print(f"Final data: {data}")
-        print(f"Core columns: {core_columns}")
-
-        dynamic_table = DynamicTable.query.filter_by(table_name=table_name).first()
-        is_independent = dynamic_table.is_independent if dynamic_table else False
-
-        return render_template('data/table_view.html',
+        return set_validators(render_template('data/table_view.html',
                                table_name=table_name,
                                data=data,
                                columns=columns,
                                core_columns=core_columns,
-                               user_permissions=current_user.permissions.split(','),
-                               user_tables=current_user.get_accessible_tables(),
-                               is_independent=is_independent)
+                               query=query,
+                               next_cursor=next_cursor,
+                               view_endpoint='data.view_table',
+                               view_args={'table_name': table_name},
+                               user_permissions=user_permissions,
+                               user_tables=user_tables,
+                               is_independent=is_independent), etag, last_modified)
     except Exception as e:
-        print(f"Error viewing table {table_name}: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f"Error viewing table {table_name}: {str(e)}")
         flash(f'Error viewing table: {str(e)}', 'error')
         return redirect(url_for('main.dashboard'))
 
 @bp.route('/select_view/<table_name>')
 @login_required
 def select_view(table_name):
-    if table_name not in current_user.get_accessible_tables():
+    if not current_user.can_access_table(table_name):
         flash('You do not have permission to view this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -110,7 +153,7 @@ def select_view(table_name):
 @bp.route('/view_data/<table_name>/<view_type>')
 @login_required
 def view_data(table_name, view_type):
-    if table_name not in current_user.get_accessible_tables():
+    if not current_user.can_access_table(table_name):
         flash('You do not have permission to view this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -119,26 +162,39 @@ def view_data(table_name, view_type):
         flash('Table not found.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    CoreTableAlias = aliased(CoreTable)
-    data = db.session.query(Table, CoreTableAlias).outerjoin(
-        CoreTableAlias, Table.core_uuid == CoreTableAlias.uuid
-    ).all()
+    try:
+        query = TableQuery.from_args(Table, request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('data.view_data', table_name=table_name, view_type=view_type))
+
+    user_permissions = current_user.get_permissions()
+    etag, last_modified, generation = _table_validators(Table, view_type, query.cache_key(), user_permissions)
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    _, data, next_cursor = _fetch_rows_with_core(Table, query, generation)
 
     columns = [column.name for column in Table.columns
                if column.name not in ['id', 'core_uuid', 'created_at', 'updated_at']]
     core_columns = ['name', 'description']
 
-    return render_template(f'data/{view_type}_view.html',
+    return set_validators(render_template(f'data/{view_type}_view.html',
                            table_name=table_name,
                            data=data,
                            columns=columns,
                            core_columns=core_columns,
-                           user_permissions=current_user.permissions.split(','))
+                           query=query,
+                           next_cursor=next_cursor,
+                           view_endpoint='data.view_data',
+                           view_args={'table_name': table_name, 'view_type': view_type},
+                           user_permissions=user_permissions), etag, last_modified)
 
 @bp.route('/add_entry/<table_name>', methods=['GET', 'POST'])
 @login_required
 def add_entry(table_name):
-    if 'edit' not in current_user.permissions.split(',') or not current_user.can_access_table(table_name):
+    if not current_user.can_edit(table_name):
         flash('You do not have permission to add entries to this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -152,7 +208,7 @@ def add_entry(table_name):
         flash('Table not found.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    core_entries = None if dynamic_table.is_independent else CoreTable.query.all()
+    selected_core = None
 
     if request.method == 'POST':
         new_entry = {}
@@ -164,27 +220,26 @@ def add_entry(table_name):
             core_id = request.form.get('core_id')
             if not core_id:
                 flash('Please select a core entry.', 'error')
-                return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, core_entries=core_entries, is_independent=dynamic_table.is_independent)
-            core_entry = CoreTable.query.get(core_id)
+                return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, selected_core=selected_core, is_independent=dynamic_table.is_independent)
+            core_entry = db.session.get(CoreTable, core_id)
             if core_entry:
+                selected_core = core_entry
                 new_entry['core_uuid'] = core_entry.uuid
             else:
                 flash('Invalid core entry selected.', 'error')
-                return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, core_entries=core_entries, is_independent=dynamic_table.is_independent)
+                return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, selected_core=selected_core, is_independent=dynamic_table.is_independent)
 
         reason = request.form.get('reason')
         if not reason:
             flash('Please provide a reason for this entry.', 'error')
-            return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, core_entries=core_entries, is_independent=dynamic_table.is_independent)
+            return render_template('data/add_entry.html', table_name=table_name, columns=Table.columns, selected_core=selected_core, is_independent=dynamic_table.is_independent)
 
         try:
-            stmt = insert(Table).values(**new_entry)
-            result = db.session.execute(stmt)
-            db.session.commit()
-
-            log_entry = Log(user_id=current_user.id, action='add', table_name=table_name,
-                            entry_id=result.inserted_primary_key[0], reason=reason)
-            db.session.add(log_entry)
+            new_entry = coerce_row(Table, new_entry)
+            stmt = statement_cache.get(Table, 'insert', new_entry)
+            result = db.session.execute(stmt, bind_values(new_entry))
+            audit_log.record(current_user.id, 'add', table_name, result.inserted_primary_key[0], reason)
+            record_change(table_name, 1)
             db.session.commit()
 
             flash('New entry added successfully.', 'success')
@@ -194,12 +249,12 @@ def add_entry(table_name):
             flash(f'Error adding entry: {str(e)}', 'error')
 
     columns = [column for column in Table.columns if column.name not in ['id', 'created_at', 'updated_at', 'core_uuid']]
-    return render_template('data/add_entry.html', table_name=table_name, columns=columns, core_entries=core_entries, is_independent=dynamic_table.is_independent)
+    return render_template('data/add_entry.html', table_name=table_name, columns=columns, selected_core=selected_core, is_independent=dynamic_table.is_independent)
 
 @bp.route('/edit_entry/<table_name>/<int:entry_id>', methods=['GET', 'POST'])
 @login_required
 def edit_entry(table_name, entry_id):
-    if 'edit' not in current_user.permissions.split(',') or table_name not in current_user.get_accessible_tables():
+    if not current_user.can_edit(table_name):
         flash('You do not have permission to edit entries in this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -208,8 +263,8 @@ def edit_entry(table_name, entry_id):
         flash('Table not found.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    stmt = select(Table).where(Table.c.id == entry_id)
-    result = db.session.execute(stmt).first()
+    stmt = statement_cache.get(Table, 'select_by_id')
+    result = db.session.execute(stmt, {ID_PARAM: entry_id}).first()
 
     if result is None:
         flash('Entry not found.', 'error')
@@ -217,26 +272,36 @@ def edit_entry(table_name, entry_id):
 
     columns = [column for column in Table.columns
                if column.name not in ['id', 'core_uuid', 'created_at', 'updated_at']]
+    has_core = 'core_uuid' in Table.c
+    selected_core = CoreTable.query.filter_by(uuid=result.core_uuid).first() if has_core else None
 
     if request.method == 'POST':
         reason = request.form.get('reason')
         if not reason:
             flash('Please provide a reason for this edit.', 'error')
-            entry = {column.name: getattr(result, column.name) for column in Table.columns}
-            return render_template('data/edit_entry.html', table_name=table_name, entry=entry, columns=columns)
+            entry = {column.name: format_value(column_type_name(Table, column.name), getattr(result, column.name))
+                     for column in Table.columns}
+            return render_template('data/edit_entry.html', table_name=table_name, entry=entry, columns=columns,
+                                   has_core=has_core, selected_core=selected_core)
 
         try:
             update_data = {}
             for column in columns:
                 update_data[column.name] = request.form.get(column.name)
+            update_data = coerce_row(Table, update_data)
+            core_id = request.form.get('core_id')
+            if has_core and core_id and (selected_core is None or str(selected_core.id) != core_id):
+                core_entry = db.session.get(CoreTable, core_id)
+                if core_entry is None:
+                    raise ValueError('Invalid core entry selected.')
+                update_data['core_uuid'] = core_entry.uuid
 
-            stmt = update(Table).where(Table.c.id == entry_id).values(**update_data)
-            db.session.execute(stmt)
+            stmt = statement_cache.get(Table, 'update_by_id', update_data)
+            db.session.execute(stmt, dict(bind_values(update_data), **{ID_PARAM: entry_id}))
 
             # Log the action
-            log_entry = Log(user_id=current_user.id, action='edit', table_name=table_name,
-                            entry_id=entry_id, reason=reason)
-            db.session.add(log_entry)
+            audit_log.record(current_user.id, 'edit', table_name, entry_id, reason)
+            record_change(table_name)
             db.session.commit()
 
             flash('Entry updated successfully.', 'success')
@@ -246,8 +311,10 @@ def edit_entry(table_name, entry_id):
             logging.error(f"Error updating entry: {str(e)}")
             flash(f'Error updating entry: {str(e)}', 'error')
 
-    entry = {column.name: getattr(result, column.name) for column in Table.columns}
-    return render_template('data/edit_entry.html', table_name=table_name, entry=entry, columns=columns)
+    entry = {column.name: format_value(column_type_name(Table, column.name), getattr(result, column.name))
+             for column in Table.columns}
+    return render_template('data/edit_entry.html', table_name=table_name, entry=entry, columns=columns,
+                           has_core=has_core, selected_core=selected_core)
 
 def get_table_data(table_name):
     Table = get_table_class(table_name)
@@ -266,7 +333,7 @@ def get_table_schema(table_name):
 @bp.route('/create/<table_name>', methods=['POST'])
 @login_required
 def create_entry(table_name):
-    if table_name not in (current_user.accessible_tables or '').split(','):
+    if not current_user.can_edit(table_name):
         return jsonify({'error': 'Permission denied'}), 403
 
     Table = get_table_class(table_name)
@@ -274,50 +341,117 @@ def create_entry(table_name):
         return jsonify({'error': 'Table not found'}), 404
 
     data = request.json
-    new_entry = Table(**data)
-    db.session.add(new_entry)
-    db.session.commit()
-    return jsonify({'message': 'Entry created successfully'}), 201
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+
+    try:
+        entry_id = insert_entry(Table, data)
+        record_change(table_name, 1)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'message': 'Entry created successfully', 'id': entry_id}), 201
 
 @bp.route('/update/<table_name>/<int:entry_id>', methods=['PUT'])
 @login_required
 def update_entry(table_name, entry_id):
-    if table_name not in (current_user.accessible_tables or '').split(','):
+    if not current_user.can_edit(table_name):
         return jsonify({'error': 'Permission denied'}), 403
 
     Table = get_table_class(table_name)
     if Table is None:
         return jsonify({'error': 'Table not found'}), 404
 
-    entry = db.session.query(Table).get(entry_id)
-    if not entry:
-        return jsonify({'error': 'Entry not found'}), 404
-
     data = request.json
-    for key, value in data.items():
-        setattr(entry, key, value)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
 
-    db.session.commit()
+    try:
+        result = bulk_update(Table, [dict(data, id=entry_id)])[0]
+        if result['status'] == 'not_found':
+            db.session.rollback()
+            return jsonify({'error': 'Entry not found'}), 404
+        if result['status'] == 'invalid':
+            db.session.rollback()
+            return jsonify({'error': result['error']}), 400
+
+        record_change(table_name)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
     return jsonify({'message': 'Entry updated successfully'}), 200
 
 @bp.route('/delete/<table_name>/<int:entry_id>', methods=['DELETE'])
 @login_required
 def delete_entry(table_name, entry_id):
-    if table_name not in (current_user.accessible_tables or '').split(','):
+    if not current_user.can_edit(table_name):
         return jsonify({'error': 'Permission denied'}), 403
 
     Table = get_table_class(table_name)
     if Table is None:
         return jsonify({'error': 'Table not found'}), 404
 
-    entry = db.session.query(Table).get(entry_id)
-    if not entry:
+    if not delete_table_entry(Table, entry_id):
         return jsonify({'error': 'Entry not found'}), 404
 
-    db.session.delete(entry)
+    record_change(table_name, -1)
     db.session.commit()
     return jsonify({'message': 'Entry deleted successfully'}), 200
 
+@bp.route('/core_entries/lookup')
+@login_required
+def core_entries_lookup():
+    """Typeahead source for the core entry picker: ?q=<prefix or words>&limit=N."""
+    try:
+        limit = int(request.args.get('limit', current_app.config['CORE_LOOKUP_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'Limit must be a number'}), 400
+    limit = max(1, min(limit, current_app.config['CORE_LOOKUP_MAX_LIMIT']))
+    return jsonify({'entries': lookup_core_entries(request.args.get('q', ''), limit)})
+
+@bp.route('/core_records', methods=['GET', 'POST'])
+@bp.route('/core_records/<core_uuid>')
+@login_required
+def core_records(core_uuid=None):
+    """
+    Returns every row in every accessible dependent table that references
+    the given core uuids, nested under each core record. uuids come from the
+    URL, repeated ?uuid= arguments or a JSON body {"uuids": [...]};
+    ?tables=a,b narrows the tables searched and ?concurrent=0 queries them
+    one after another.
+    """
+    if core_uuid is not None:
+        uuids = [core_uuid]
+    elif request.method == 'POST':
+        data = request.json
+        uuids = data.get('uuids') if isinstance(data, dict) else None
+        if not isinstance(uuids, list) or not all(isinstance(uuid, str) for uuid in uuids):
+            return jsonify({'error': 'Expected a JSON object with a list of uuids'}), 400
+    else:
+        uuids = request.args.getlist('uuid')
+    if not uuids:
+        return jsonify({'error': 'At least one core uuid is required'}), 400
+    max_uuids = current_app.config['CORE_FETCH_MAX_UUIDS']
+    if len(uuids) > max_uuids:
+        return jsonify({'error': f'At most {max_uuids} core uuids can be fetched at once'}), 400
+
+    allowed = None if current_user.is_admin else current_user.permission_set().tables
+    table_names = dependent_tables(allowed)
+    if request.args.get('tables'):
+        requested = set(request.args['tables'].split(','))
+        table_names = [name for name in table_names if name in requested]
+
+    result = fetch_core_records(uuids, table_names, concurrent=request.args.get('concurrent', '1') != '0')
+    result['tables'] = table_names
+    if core_uuid is not None and not result['cores']:
+        return jsonify({'error': 'Core entry not found'}), 404
+    return jsonify(result)
+
 @bp.route('/list_tables')
 @login_required
 def list_tables():
@@ -328,6 +462,7 @@ def list_tables():
 @bp.route('/debug/tables')
 def debug_tables():
     from app.models.dynamic_tables import get_all_dynamic_tables
+    from app.models.table_registry import table_registry
     from sqlalchemy import inspect
 
     inspector = inspect(db.engine)
@@ -337,6 +472,25 @@ def debug_tables():
     return jsonify({
         'all_tables': all_tables,
         'dynamic_tables': dynamic_tables,
+        'table_registry': table_registry.stats(),
+    })
+
+@bp.route('/debug/caches')
+@login_required
+def debug_caches():
+    from app.models.table_registry import table_registry
+    from app.models.user_cache import user_cache
+    from app.models.permissions import _permission_cache
+    from app.models.schema_query import plan_stats
+
+    return jsonify({
+        'table_registry': table_registry.stats(),
+        'users': user_cache.stats(),
+        'permissions': _permission_cache.stats(),
+        'schema_query_plans': plan_stats(),
+        'statements': statement_cache.stats(),
+        'core_rows': core_cache.stats(),
+        'query_results': query_cache.stats(),
     })
 
 # In app/routes/data.py
@@ -351,11 +505,18 @@ def create_dynamic_table_route():
     if request.method == 'POST':
         table_name = request.form.get('table_name')
         columns = {}
+        indexes = []
         for i in range(1, 6):  # Allow up to 5 columns
             column_name = request.form.get(f'column_name_{i}')
             column_type = request.form.get(f'column_type_{i}')
             if column_name and column_type:
                 columns[column_name] = column_type
+                if request.form.get(f'column_index_{i}') == 'on':
+                    indexes.append([column_name])
+        # One composite index per line, e.g. "last_name, first_name".
+        for line in request.form.get('composite_indexes', '').splitlines():
+            if line.strip():
+                indexes.append({'columns': line})
 
         owner_id = int(request.form.get('owner_id'))
         is_independent = request.form.get('is_independent') == 'on'
@@ -364,14 +525,13 @@ def create_dynamic_table_route():
             flash('Table name and at least one column are required.', 'error')
         else:
             try:
-                new_table = create_dynamic_table(table_name, columns, owner_id=owner_id, is_independent=is_independent)
+                new_table = create_dynamic_table(table_name, columns, owner_id=owner_id,
+                                                 is_independent=is_independent, indexes=indexes)
 
                 # Update owner's accessible tables
                 owner = User.query.get(owner_id)
                 if owner:
-                    accessible_tables = set(owner.get_accessible_tables())
-                    accessible_tables.add(table_name)
-                    owner.accessible_tables = ','.join(accessible_tables)
+                    owner.grant_tables([table_name])
                     db.session.commit()
 
                 flash(f'Dynamic table "{table_name}" created successfully.', 'success')
@@ -383,10 +543,85 @@ def create_dynamic_table_route():
     existing_tables = get_all_dynamic_tables()
     return render_template('data/create_dynamic_table.html', existing_tables=existing_tables, users=users)
 
+@bp.route('/alter_table/<table_name>', methods=['POST'])
+@login_required
+def alter_table(table_name):
+    if not current_user.can_alter(table_name):
+        return jsonify({'error': 'Only the table owner or an admin can alter a table'}), 403
+
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object with add, drop and/or retype'}), 400
+
+    try:
+        schema = alter_dynamic_table(table_name,
+                                     add=data.get('add'),
+                                     drop=data.get('drop'),
+                                     retype=data.get('retype'),
+                                     batch_size=current_app.config['ALTER_BATCH_SIZE'],
+                                     force=data.get('force') is True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error altering table {table_name}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    audit_log.record(current_user.id, 'alter', table_name, None, json.dumps(data))
+    db.session.commit()
+    return jsonify({'message': f'Table {table_name} altered successfully', 'schema': schema,
+                    'progress': get_alter_progress(table_name)})
+
+@bp.route('/alter_table/<table_name>/progress')
+@login_required
+def alter_table_progress(table_name):
+    if not current_user.can_access_table(table_name):
+        return jsonify({'error': 'Permission denied'}), 403
+    progress = get_alter_progress(table_name)
+    if progress is None:
+        return jsonify({'error': 'No ALTER has run against this table'}), 404
+    return jsonify(progress)
+
+@bp.route('/table_indexes/<table_name>', methods=['GET', 'POST'])
+@login_required
+def table_indexes(table_name):
+    if request.method == 'GET':
+        if not current_user.can_access_table(table_name):
+            return jsonify({'error': 'Permission denied'}), 403
+        try:
+            return jsonify({'table': table_name, 'indexes': list_indexes(table_name)})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+
+    if not current_user.can_alter(table_name):
+        return jsonify({'error': 'Only the table owner or an admin can manage indexes'}), 403
+    try:
+        definition = add_index(table_name, request.json)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error creating index on {table_name}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'message': f"Index {definition['name']} created", 'index': definition}), 201
+
+@bp.route('/table_indexes/<table_name>/<index_name>', methods=['DELETE'])
+@login_required
+def drop_table_index(table_name, index_name):
+    if not current_user.can_alter(table_name):
+        return jsonify({'error': 'Only the table owner or an admin can manage indexes'}), 403
+    try:
+        dropped = remove_index(table_name, index_name)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    if not dropped:
+        return jsonify({'error': 'Index not found'}), 404
+    return jsonify({'message': f'Index {index_name} dropped'})
+
 @bp.route('/update_entries/<table_name>', methods=['PUT'])
 @login_required
 def update_entries(table_name):
-    if 'edit' not in current_user.permissions.split(',') or table_name not in current_user.get_accessible_tables():
+    if not current_user.can_edit(table_name):
         return jsonify({'error': 'Permission denied'}), 403
 
     Table = get_table_class(table_name)
@@ -394,23 +629,33 @@ def update_entries(table_name):
         return jsonify({'error': 'Table not found'}), 404
 
     data = request.json
+    if not isinstance(data, list):
+        return jsonify({'error': 'Expected a JSON array of entries'}), 400
+
+    reason = request.args.get('reason') or 'Bulk update'
     try:
-        for entry in data:
-            row = db.session.query(Table).filter_by(id=entry['id']).first()
-            if row:
-                for key, value in entry.items():
-                    if key != 'id' and hasattr(row, key):
-                        setattr(row, key, value)
+        results = bulk_update(Table, data)
+        audit_log.record_many([
+            {'user_id': current_user.id, 'action': 'edit', 'table_name': table_name,
+             'entry_id': result['id'], 'reason': reason}
+            for result in results if result['status'] == 'updated'
+        ])
+        record_change(table_name)
         db.session.commit()
-        return jsonify({'message': 'Entries updated successfully'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+    failed = [result for result in results if result['status'] != 'updated']
+    if failed:
+        return jsonify({'message': f'{len(results) - len(failed)} of {len(results)} entries updated',
+                        'results': results}), 207
+    return jsonify({'message': 'Entries updated successfully', 'results': results}), 200
+
 @bp.route('/export_table_data/<table_name>')
 @login_required
 def export_table_data(table_name):
-    if table_name not in current_user.get_accessible_tables():
+    if not current_user.can_access_table(table_name):
         flash('You do not have permission to export this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -419,27 +664,66 @@ def export_table_data(table_name):
         flash('Table not found.', 'error')
         return redirect(url_for('main.dashboard'))
 
-    data = db.session.query(Table).all()
-
-    si = StringIO()
-    cw = csv.writer(si)
-
-    # Write headers
-    cw.writerow([column.name for column in Table.__table__.columns])
-
-    # Write data
-    for row in data:
-        cw.writerow([getattr(row, column.name) for column in Table.__table__.columns])
-
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = f"attachment; filename={table_name}_export.csv"
-    output.headers["Content-type"] = "text/csv"
-    return output
+    compress = request.args.get('compress') == 'gzip'
+    include_core = request.args.get('include_core') == '1' and 'core_uuid' in Table.c
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+
+    # The file depends only on the data, not on who asks for it.
+    etag, last_modified, _ = _table_validators(Table, compress, include_core, with_core=include_core, per_user=False)
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    def generate():
+        si = StringIO()
+        cw = csv.writer(si)
+        compressor = zlib.compressobj(wbits=31) if compress else None
+
+        def flush():
+            chunk = si.getvalue().encode('utf-8')
+            si.seek(0)
+            si.truncate(0)
+            return compressor.compress(chunk) if compressor else chunk
+
+        # Write headers
+        header = [column.name for column in Table.columns]
+        if include_core:
+            header += [f'core_{name}' for name in EXPORT_CORE_COLUMNS]
+            uuid_position = header.index('core_uuid')
+        cw.writerow(header)
+        # JSON values are written as JSON text so the file can be re-imported.
+        json_positions = [position for position, column in enumerate(Table.columns)
+                          if column_type_name(Table, column.name) == 'json']
+
+        # Rows come from a server-side cursor in batches, so only one batch
+        # is held in memory at a time.
+        stmt = statement_cache.get(Table, 'select_all').execution_options(yield_per=batch_size)
+        for partition in db.session.execute(stmt).partitions():
+            if json_positions:
+                partition = [list(row) for row in partition]
+                for row in partition:
+                    for position in json_positions:
+                        row[position] = format_value('json', row[position])
+            if include_core:
+                cores = get_many(row[uuid_position] for row in partition)
+                partition = [list(row) + [cores.get(row[uuid_position], {}).get(name) for name in EXPORT_CORE_COLUMNS]
+                             for row in partition]
+            cw.writerows(partition)
+            yield flush()
+
+        tail = flush()
+        yield tail + compressor.flush() if compressor else tail
+
+    filename = f"{table_name}_export.csv.gz" if compress else f"{table_name}_export.csv"
+    output = Response(stream_with_context(generate()),
+                      mimetype='application/gzip' if compress else 'text/csv')
+    output.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return set_validators(output, etag, last_modified)
 
 @bp.route('/import_table_data/<table_name>', methods=['GET', 'POST'])
 @login_required
 def import_table_data(table_name):
-    if table_name not in current_user.get_accessible_tables():
+    if not current_user.can_access_table(table_name):
         flash('You do not have permission to import data to this table.', 'error')
         return redirect(url_for('main.dashboard'))
 
@@ -457,19 +741,65 @@ def import_table_data(table_name):
             flash('No selected file', 'error')
             return redirect(request.url)
         if file:
+            def record_batch(rows):
+                # Runs in each batch's transaction, so the audit entry and the
+                # statistics commit or roll back with the rows.
+                audit_log.record(current_user.id, 'import', table_name, None,
+                                 f'CSV import of {rows} rows from {file.filename}')
+                record_change(table_name, rows)
+
             try:
-                stream = StringIO(file.stream.read().decode("UTF8"), newline=None)
-                csv_input = csv.reader(stream)
-                headers = next(csv_input)
-                for row in csv_input:
-                    new_entry = Table()
-                    for i, value in enumerate(row):
-                        setattr(new_entry, headers[i], value)
-                    db.session.add(new_entry)
-                db.session.commit()
-                flash('Data imported successfully', 'success')
-                return redirect(url_for('data.view_table', table_name=table_name))
-            except Exception as e:
-                db.session.rollback()
+                result = import_csv(Table, file.stream, batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+                                    on_batch=record_batch)
+            except ValueError as e:
                 flash(f'Error importing data: {str(e)}', 'error')
+                return render_template('data/import_table_data.html', table_name=table_name)
+
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify(result.to_dict()), 200 if not result.errors else 207
+
+            flash(f'Imported {result.rows_imported} rows in {result.batches} batches '
+                  f'({result.rows_per_second:.0f} rows/sec).', 'success' if not result.errors else 'info')
+            for error in result.errors[:10]:
+                flash(f"Lines {error['first_line']}-{error['last_line']}: {error['message']}", 'error')
+            hidden = len(result.errors) - 10 + result.errors_omitted
+            if hidden > 0:
+                flash(f'{hidden} more errors not shown.', 'error')
+            return redirect(url_for('data.view_table', table_name=table_name))
     return render_template('data/import_table_data.html', table_name=table_name)
+
+@bp.cli.command('alter-table')
+@click.argument('table_name')
+@click.option('--add', 'add', multiple=True, metavar='NAME:TYPE', help='Column to add.')
+@click.option('--drop', 'drop', multiple=True, metavar='NAME', help='Column to drop.')
+@click.option('--retype', 'retype', multiple=True, metavar='NAME:TYPE', help='Column to change type.')
+@click.option('--force', is_flag=True, help='Drop or retype columns even if schemas join on them.')
+def alter_table_command(table_name, add, drop, retype, force):
+    """Add, drop or retype columns of a dynamic table."""
+    def pairs(values):
+        return dict(value.split(':', 1) for value in values)
+
+    def report(copied, total):
+        click.echo(f'{table_name}: copied {copied}/{total} rows')
+
+    try:
+        schema = alter_dynamic_table(table_name, add=pairs(add), drop=drop, retype=pairs(retype),
+                                     batch_size=current_app.config['ALTER_BATCH_SIZE'], progress=report, force=force)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'{table_name}: {schema}')
+
+@bp.cli.command('sync-indexes')
+def sync_indexes_command():
+    """Build declared indexes (and the default core_uuid index) that are missing."""
+    created = sync_indexes(get_all_dynamic_tables())
+    for name in created:
+        click.echo(f'Created {name}')
+    click.echo(f'{len(created)} indexes created')
+
+@bp.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """Recount rows and sizes for every dynamic table."""
+    refreshed = reconcile_statistics(get_all_dynamic_tables())
+    for stats in refreshed:
+        click.echo(f'{stats.table_name}: {stats.row_count} rows, {stats.size_bytes} bytes')
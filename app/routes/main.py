@@ -4,6 +4,7 @@ from flask import Blueprint, render_template, redirect, url_for
 from flask_login import login_required, current_user
 from app.models.schema_definition import SchemaDefinition
 from app.models.dynamic_table import DynamicTable
+from app.models.table_statistics import TableStatistics
 
 bp = Blueprint('main', __name__)
 
@@ -16,9 +17,7 @@ def index():
 @bp.route('/dashboard')
 @login_required
 def dashboard():
-    accessible_tables = current_user.get_accessible_tables()
-    owned_tables = [table.table_name for table in current_user.owned_tables]
-    all_tables = list(set(accessible_tables + owned_tables))
+    all_tables = sorted(current_user.permission_set().tables)
 
     # Fetch all schemas
     if current_user.is_admin:
@@ -34,9 +33,13 @@ def dashboard():
         columns = ', '.join(schema_info.keys())
         table_descriptions[table.table_name] = f"Columns: {columns}"
 
+    # Precomputed by the write paths and the reconcile-stats job
+    table_stats = {stats.table_name: stats for stats in TableStatistics.query.all()}
+
     return render_template('dashboard.html',
                            username=current_user.username,
                            tables=all_tables,
                            table_descriptions=table_descriptions,
+                           table_stats=table_stats,
                            schemas=schemas,
                            is_admin=current_user.is_admin)
@@ -4,12 +4,16 @@ import json, logging
 import csv
 from io import StringIO
 from flask import send_file
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, abort, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import load_only
 from app import db
 from app.models.schema_definition import SchemaDefinition
-from app.models.table_relationship import TableRelationship
+from app.models.table_relationship import TableRelationship, sync_schema_edges, delete_schema_edges, schemas_referencing
 from app.models.dynamic_tables import get_all_dynamic_tables
+from app.models.schema_graph import get_schema_graph
+from app.models.schema_query import compile_plan
+from app.conditional import make_etag, not_modified, set_validators
 
 bp = Blueprint('schema', __name__)
 
@@ -36,6 +40,8 @@ def create_schema():
         else:
             new_schema = SchemaDefinition(name=name, description=description, structure=structure, owner_id=current_user.id)
             db.session.add(new_schema)
+            db.session.flush()
+            sync_schema_edges(new_schema)
             db.session.commit()
             flash('Schema created successfully.', 'success')
             return redirect(url_for('schema.manage_schemas'))
@@ -59,12 +65,6 @@ def edit_schema(schema_id):
         return redirect(url_for('schema.manage_schemas'))
 
     if request.method == 'POST':
-        # Create a new version of the schema
-        new_schema = schema.create_new_version()
-
-        new_schema.name = request.form['name']
-        new_schema.description = request.form['description']
-
         # Process the relationships
         parents = request.form.getlist('parent[]')
         children = request.form.getlist('child[]')
@@ -83,8 +83,14 @@ def edit_schema(schema_id):
             flash('At least one valid relationship is required.', 'error')
             return render_template('schema/edit_schema.html', schema=schema)
 
-        new_schema.structure = json.dumps(new_structure)
+        # Create a new version of the schema, numbered after the latest
+        # version under its (possibly new) name
+        new_schema = schema.create_new_version(new_structure, name=request.form['name'])
+        new_schema.description = request.form['description']
+
         try:
+            db.session.flush()
+            sync_schema_edges(new_schema)
             db.session.commit()
             flash('New schema version created successfully.', 'success')
             return redirect(url_for('schema.view_schema', schema_id=new_schema.id))
@@ -99,49 +105,122 @@ def edit_schema(schema_id):
 @login_required
 def delete_schema(schema_id):
     schema = SchemaDefinition.query.get_or_404(schema_id)
+    # Versions stored as deltas against this one need their own snapshot first.
+    # Reparent through the relationship (iterating over a copy, since that
+    # removes each child from schema.children) so the flush cannot reset it.
+    for child in list(schema.children):
+        child.materialize()
+        child.parent = schema.parent
+    delete_schema_edges(schema.id)
     db.session.delete(schema)
     db.session.commit()
     return jsonify({'success': True})
 
+def _schema_validators(schema_id, *parts):
+    """
+    Returns (stamp, etag, last_modified) for a response built from one schema
+    version, reading only its change generation and timestamps. stamp holds
+    owner_id for permission checks; aborts with 404 for unknown schemas.
+    """
+    stamp = db.session.execute(
+        db.select(SchemaDefinition.owner_id, SchemaDefinition.generation, SchemaDefinition.updated_at)
+        .where(SchemaDefinition.id == schema_id)
+    ).first()
+    if stamp is None:
+        abort(404)
+    return stamp, make_etag('schema', schema_id, stamp.generation, *parts, per_user=False), stamp.updated_at
+
 @bp.route('/schema_visualization/<int:schema_id>')
 @login_required
 def schema_visualization(schema_id):
-    schema = SchemaDefinition.query.get_or_404(schema_id)
-
-    logging.info(f"Schema structure: {schema.structure_json}")
+    _, etag, last_modified = _schema_validators(schema_id, 'visualization')
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
 
-    nodes = []
-    links = []
+    schema = SchemaDefinition.query.get_or_404(schema_id)
+    return set_validators(jsonify(get_schema_graph(schema).to_visualization()), etag, last_modified)
 
-    for relationship in schema.get_relationships():
-        parent = relationship.get('parent')
-        child = relationship.get('child')
+def _graph_or_404(schema_id, table_name):
+    schema = SchemaDefinition.query.get_or_404(schema_id)
+    graph = get_schema_graph(schema)
+    if table_name not in graph:
+        abort(404)
+    return graph
 
-        logging.info(f"Relationship: parent={parent}, child={child}")
+@bp.route('/schema_graph/<int:schema_id>/ancestors/<table_name>')
+@login_required
+def schema_ancestors(schema_id, table_name):
+    graph = _graph_or_404(schema_id, table_name)
+    return jsonify({'table': table_name, 'ancestors': graph.ancestors(table_name)})
 
-        if parent and child:
-            if parent not in nodes:
-                nodes.append(parent)
-            if child not in nodes:
-                nodes.append(child)
+@bp.route('/schema_graph/<int:schema_id>/descendants/<table_name>')
+@login_required
+def schema_descendants(schema_id, table_name):
+    graph = _graph_or_404(schema_id, table_name)
+    return jsonify({'table': table_name, 'descendants': graph.descendants(table_name)})
 
-            links.append({
-                'source': nodes.index(parent),
-                'target': nodes.index(child),
-                'type': relationship.get('type', 'unknown')
-            })
+@bp.route('/schema_graph/<int:schema_id>/path')
+@login_required
+def schema_path(schema_id):
+    source = request.args.get('from')
+    target = request.args.get('to')
+    if not source or not target:
+        return jsonify({'error': "Both 'from' and 'to' are required"}), 400
+    graph = _graph_or_404(schema_id, source)
+    directed = request.args.get('directed', 'true') != 'false'
+    return jsonify({'from': source, 'to': target, 'path': graph.shortest_path(source, target, directed=directed)})
+
+@bp.route('/schema_graph/<int:schema_id>/cycles')
+@login_required
+def schema_cycles(schema_id):
+    schema = SchemaDefinition.query.get_or_404(schema_id)
+    cycles = get_schema_graph(schema).find_cycles()
+    return jsonify({'has_cycles': bool(cycles), 'cycles': cycles})
 
-    result = {
-        'nodes': [{'id': node} for node in nodes],
-        'links': links
-    }
-    logging.info(f"Visualization data: {result}")
-    return jsonify(result)
+@bp.route('/schema_query/<int:schema_id>/<root_table>')
+@login_required
+def schema_query(schema_id, root_table):
+    schema = SchemaDefinition.query.get_or_404(schema_id)
+    allowed = set(get_schema_graph(schema).nodes) if current_user.is_admin else current_user.permission_set().tables
+
+    args = request.args
+    filters = {key[len('filter_'):]: value for key, value in args.items() if key.startswith('filter_') and value != ''}
+    try:
+        after = int(args.get('after', 0))
+        page_size = int(args.get('page_size', current_app.config['TABLE_PAGE_SIZE']))
+        page_size = max(1, min(page_size, current_app.config['TABLE_MAX_PAGE_SIZE']))
+        plan = compile_plan(schema, root_table, allowed)
+        rows, next_after = plan.execute(after=after, limit=page_size, filters=filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'schema_id': schema.id,
+        'version': schema.version,
+        'root': root_table,
+        'tables': list(plan.tables),
+        'skipped': plan.skipped,
+        'rows': rows,
+        'next_after': next_after
+    })
+
+@bp.route('/table_dependents/<table_name>')
+@login_required
+def table_dependents(table_name):
+    schemas = schemas_referencing(table_name)
+    return jsonify({
+        'table': table_name,
+        'schemas': [{'id': schema.id, 'name': schema.name, 'version': schema.version} for schema in schemas]
+    })
 
 @bp.route('/schema_versions/<string:schema_name>')
 @login_required
 def schema_versions(schema_name):
-    schemas = SchemaDefinition.query.filter_by(name=schema_name).order_by(SchemaDefinition.version.desc()).all()
+    schemas = SchemaDefinition.query.filter_by(name=schema_name).options(
+        load_only(SchemaDefinition.id, SchemaDefinition.name, SchemaDefinition.version,
+                  SchemaDefinition.created_at, SchemaDefinition.parent_id, SchemaDefinition.is_snapshot)
+    ).order_by(SchemaDefinition.version.desc()).all()
     return render_template('schema/schema_versions.html', schemas=schemas, schema_name=schema_name)
 
 @bp.route('/revert_schema/<int:schema_id>')
@@ -153,6 +232,8 @@ def revert_schema(schema_id):
         return redirect(url_for('schema.manage_schemas'))
 
     new_schema = schema.create_new_version()
+    db.session.flush()
+    sync_schema_edges(new_schema)
     db.session.commit()
     flash(f'Reverted to schema version {schema.version}', 'success')
     return redirect(url_for('schema.view_schema', schema_id=new_schema.id))
@@ -160,19 +241,23 @@ def revert_schema(schema_id):
 @bp.route('/export_schema/<int:schema_id>')
 @login_required
 def export_schema(schema_id):
-    schema = SchemaDefinition.query.get_or_404(schema_id)
-    if schema.owner_id != current_user.id and not current_user.is_admin:
+    stamp, etag, last_modified = _schema_validators(schema_id, 'export')
+    if stamp.owner_id != current_user.id and not current_user.is_admin:
         flash('You do not have permission to export this schema.', 'error')
         return redirect(url_for('schema.manage_schemas'))
+    cached = not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
 
+    schema = SchemaDefinition.query.get_or_404(schema_id)
     data = {
         'name': schema.name,
         'description': schema.description,
-        'structure': schema.structure,
+        'structure': json.dumps(schema.get_relationships()),
         'version': schema.version
     }
 
-    return jsonify(data)
+    return set_validators(jsonify(data), etag, last_modified)
 
 @bp.route('/import_schema', methods=['GET', 'POST'])
 @login_required
@@ -196,9 +281,21 @@ def import_schema():
                     version=data['version']
                 )
                 db.session.add(new_schema)
+                db.session.flush()
+                sync_schema_edges(new_schema)
                 db.session.commit()
                 flash('Schema imported successfully', 'success')
                 return redirect(url_for('schema.view_schema', schema_id=new_schema.id))
             except Exception as e:
                 flash(f'Error importing schema: {str(e)}', 'error')
     return render_template('schema/import_schema.html')
+
+@bp.cli.command('sync-edges')
+def sync_edges_command():
+    """Rebuild the materialized relationship edges for every schema version."""
+    import click
+    schemas = SchemaDefinition.query.order_by(SchemaDefinition.id).all()
+    for schema in schemas:
+        sync_schema_edges(schema)
+    db.session.commit()
+    click.echo(f'Synced relationship edges for {len(schemas)} schema versions')
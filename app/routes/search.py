@@ -0,0 +1,67 @@
+# File: app/routes/search.py
+
+import click
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from app.models.dynamic_table import DynamicTable
+from app.models.search import CORE_TABLE, search_table, search_columns, search_backend, ensure_search_indexes
+
+bp = Blueprint('search', __name__)
+
+def _search_args():
+    query = request.args.get('q', '').strip()
+    if not query:
+        raise ValueError("A search query ('q') is required")
+    try:
+        page_size = int(request.args.get('page_size', current_app.config['SEARCH_PAGE_SIZE']))
+    except ValueError:
+        raise ValueError('Page size must be a number')
+    return query, max(1, min(page_size, current_app.config['TABLE_MAX_PAGE_SIZE']))
+
+def _searchable_tables():
+    names = [name for (name,) in DynamicTable.query.with_entities(DynamicTable.table_name).all()]
+    if not current_user.is_admin:
+        allowed = current_user.permission_set().tables
+        names = [name for name in names if name in allowed]
+    return [CORE_TABLE] + sorted(names)
+
+@bp.route('/search')
+@login_required
+def search_all():
+    """Returns the best page of matches from the core table and every accessible dynamic table."""
+    try:
+        query, page_size = _search_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    requested = set(request.args['tables'].split(',')) if request.args.get('tables') else None
+    results = {}
+    for table_name in _searchable_tables():
+        if requested is not None and table_name not in requested:
+            continue
+        if not search_columns(table_name):
+            continue
+        rows, next_after = search_table(table_name, query, limit=page_size)
+        if rows:
+            results[table_name] = {'rows': rows, 'next_after': next_after}
+    return jsonify({'query': query, 'backend': search_backend(), 'results': results})
+
+@bp.route('/search/<table_name>')
+@login_required
+def search_one(table_name):
+    """Ranked, keyset-paginated search over a single table."""
+    if table_name not in _searchable_tables():
+        return jsonify({'error': 'Permission denied'}), 403
+    try:
+        query, page_size = _search_args()
+        rows, next_after = search_table(table_name, query, limit=page_size, cursor=request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'query': query, 'table': table_name, 'rows': rows, 'next_after': next_after})
+
+@bp.cli.command('rebuild')
+@click.option('--missing-only', is_flag=True, help='Only create indexes that do not exist yet.')
+def rebuild_command(missing_only):
+    """Create or rebuild the full-text search indexes."""
+    indexed = ensure_search_indexes(rebuild=not missing_only)
+    click.echo(f"Search indexes ready ({search_backend()}): {', '.join(indexed)}")
@@ -7,3 +7,28 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ncdb_app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = True
+    TABLE_PAGE_SIZE = int(os.environ.get('TABLE_PAGE_SIZE', 50))
+    TABLE_MAX_PAGE_SIZE = int(os.environ.get('TABLE_MAX_PAGE_SIZE', 500))
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'transactional')  # or 'buffered'
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 500))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2.0))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+    SCHEMA_SNAPSHOT_INTERVAL = int(os.environ.get('SCHEMA_SNAPSHOT_INTERVAL', 10))
+    ALTER_BATCH_SIZE = int(os.environ.get('ALTER_BATCH_SIZE', 1000))
+    CORE_FETCH_MAX_UUIDS = int(os.environ.get('CORE_FETCH_MAX_UUIDS', 100))
+    CORE_FETCH_WORKERS = int(os.environ.get('CORE_FETCH_WORKERS', 1))  # above 1 reads tables in parallel, not as one snapshot
+    SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+    CORE_LOOKUP_LIMIT = int(os.environ.get('CORE_LOOKUP_LIMIT', 20))
+    CORE_LOOKUP_MAX_LIMIT = int(os.environ.get('CORE_LOOKUP_MAX_LIMIT', 50))
+    CORE_LOOKUP_CACHE_SIZE = int(os.environ.get('CORE_LOOKUP_CACHE_SIZE', 512))
+    CORE_LOOKUP_CACHE_TTL = float(os.environ.get('CORE_LOOKUP_CACHE_TTL', 60))
+    CORE_CACHE_SIZE = int(os.environ.get('CORE_CACHE_SIZE', 4096))
+    CORE_CACHE_TTL = float(os.environ.get('CORE_CACHE_TTL', 300))
+    QUERY_CACHE_BACKEND = os.environ.get('QUERY_CACHE_BACKEND', 'memory')  # memory, file or none
+    QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', 1024))
+    QUERY_CACHE_MAX_ROWS = int(os.environ.get('QUERY_CACHE_MAX_ROWS', 50000))  # memory backend; rows across all pages
+    QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', 300))
+    QUERY_CACHE_PATH = os.environ.get('QUERY_CACHE_PATH')  # file backend; defaults to the instance folder
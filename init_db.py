@@ -7,6 +7,8 @@ from app.models.schema_definition import SchemaDefinition
 from app.models.core_table import CoreTable
 from app.models.log import Log
 from app.models.dynamic_tables import ensure_dynamic_tables_exist
+from app.models.table_relationship import sync_schema_edges
+from app.models.search import ensure_search_indexes
 from werkzeug.security import generate_password_hash
 import logging
 import uuid
@@ -22,6 +24,8 @@ def init_database():
             admin = create_admin_user()
             create_core_entries()
             ensure_dynamic_tables_exist(admin.id)
+            db.session.commit()
+            ensure_search_indexes()
             create_sample_schemas(admin.id)
             create_regular_users(admin.id)
 
@@ -37,7 +41,6 @@ def create_admin_user():
         admin = User(
             username='admin',
             password_hash=generate_password_hash('admin123'),
-            accessible_tables='',
             permissions='view,edit,update,create',
             is_admin=True
         )
@@ -47,7 +50,7 @@ def create_admin_user():
 
     # Update admin's accessible tables
     dynamic_tables = DynamicTable.query.all()
-    admin.accessible_tables = ','.join([table.table_name for table in dynamic_tables])
+    admin.set_accessible_tables([table.table_name for table in dynamic_tables])
     db.session.commit()
     logging.info("Admin user's accessible tables updated.")
     return admin
@@ -120,12 +123,12 @@ def create_regular_users(admin_id):
             user = User(
                 username=user_data['username'],
                 password_hash=generate_password_hash(user_data['password']),
-                accessible_tables=user_data['accessible_tables'],
                 permissions=user_data['permissions'],
                 is_admin=False
             )
             db.session.add(user)
             db.session.flush()  # This will assign an ID to the user
+            user.set_accessible_tables(user_data['accessible_tables'].split(','))
 
             # Log the user creation
             log_entry = Log(
@@ -172,6 +175,8 @@ def create_sample_schemas(admin_id):
             owner_id=admin_id
         )
         db.session.add(schema)
+        db.session.flush()
+        sync_schema_edges(schema)
 
     db.session.commit()
     logging.info(f"{len(sample_schemas)} sample schemas created successfully.")
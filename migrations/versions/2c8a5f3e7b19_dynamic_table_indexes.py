@@ -0,0 +1,62 @@
+"""Declared indexes on dynamic tables
+
+Revision ID: 2c8a5f3e7b19
+Revises: 9b4e6f1a3d57
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8a5f3e7b19'
+down_revision = '9b4e6f1a3d57'
+branch_labels = None
+depends_on = None
+
+
+dynamic_tables = sa.table(
+    'dynamic_tables',
+    sa.column('id', sa.Integer),
+    sa.column('table_name', sa.String),
+    sa.column('is_independent', sa.Boolean),
+    sa.column('indexes', sa.JSON)
+)
+
+
+def _index_name(table_name):
+    # Mirrors app.models.table_indexes.index_name at the time of writing.
+    name = f'ix_{table_name}_core_uuid'
+    if len(name) > 63:
+        name = f"{name[:54]}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+    return name
+
+
+def upgrade():
+    with op.batch_alter_table('dynamic_tables') as batch_op:
+        batch_op.add_column(sa.Column('indexes', sa.JSON(), nullable=True))
+
+    # Index core_uuid on existing core-dependent tables.
+    connection = op.get_bind()
+    quote = connection.dialect.identifier_preparer.quote
+    rows = connection.execute(sa.select(dynamic_tables.c.id, dynamic_tables.c.table_name,
+                                        dynamic_tables.c.is_independent)).all()
+    for table_id, table_name, is_independent in rows:
+        indexes = []
+        if not is_independent:
+            name = _index_name(table_name)
+            op.execute(f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table_name)} (core_uuid)')
+            indexes.append({'name': name, 'columns': ['core_uuid'], 'unique': False})
+        connection.execute(dynamic_tables.update().where(dynamic_tables.c.id == table_id).values(indexes=indexes))
+
+
+def downgrade():
+    connection = op.get_bind()
+    quote = connection.dialect.identifier_preparer.quote
+    for (indexes,) in connection.execute(sa.select(dynamic_tables.c.indexes)).all():
+        for index in indexes or []:
+            op.execute(f"DROP INDEX IF EXISTS {quote(index['name'])}")
+    with op.batch_alter_table('dynamic_tables') as batch_op:
+        batch_op.drop_column('indexes')
@@ -0,0 +1,41 @@
+"""Audit log indexes and archive partitions
+
+Revision ID: 3a9c1e7d2b40
+Revises: f4cdb9ea5bd7
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9c1e7d2b40'
+down_revision = 'f4cdb9ea5bd7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_log_table_entry', 'log', ['table_name', 'entry_id', 'id'])
+    op.create_index('ix_log_user', 'log', ['user_id', 'id'])
+    op.create_index('ix_log_timestamp', 'log', ['timestamp'])
+    op.create_table('log_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=7), nullable=False),
+    sa.Column('first_log_id', sa.Integer(), nullable=False),
+    sa.Column('last_log_id', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_log_archive_period', 'log_archive', ['period'])
+
+
+def downgrade():
+    op.drop_index('ix_log_archive_period', table_name='log_archive')
+    op.drop_table('log_archive')
+    op.drop_index('ix_log_timestamp', table_name='log')
+    op.drop_index('ix_log_user', table_name='log')
+    op.drop_index('ix_log_table_entry', table_name='log')
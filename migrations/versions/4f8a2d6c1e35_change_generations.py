@@ -0,0 +1,47 @@
+"""Change generations for tables and schemas
+
+Revision ID: 4f8a2d6c1e35
+Revises: 7d1f4c9a2e68
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2d6c1e35'
+down_revision = '7d1f4c9a2e68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('table_statistics') as batch_op:
+        batch_op.add_column(sa.Column('generation', sa.BigInteger(), nullable=False, server_default='0'))
+    with op.batch_alter_table('schema_definitions') as batch_op:
+        batch_op.add_column(sa.Column('generation', sa.BigInteger(), nullable=False, server_default='1'))
+
+    # Tables without a statistics row would have no generation to version
+    # their responses with; give every dynamic table and the core table one.
+    connection = op.get_bind()
+    existing = set(sa.inspect(connection).get_table_names())
+    counted = {name for (name,) in connection.execute(sa.text('SELECT table_name FROM table_statistics'))}
+    stats = sa.table('table_statistics', sa.column('table_name'), sa.column('row_count'),
+                     sa.column('avg_row_bytes'), sa.column('generation'))
+    names = [name for (name,) in connection.execute(sa.text('SELECT table_name FROM dynamic_tables'))]
+    rows = []
+    for table_name in names + ['core_table']:
+        if table_name in counted or table_name not in existing:
+            continue
+        row_count = connection.execute(sa.select(sa.func.count()).select_from(sa.table(table_name))).scalar()
+        rows.append({'table_name': table_name, 'row_count': row_count, 'avg_row_bytes': 0, 'generation': 1})
+    if rows:
+        op.bulk_insert(stats, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('schema_definitions') as batch_op:
+        batch_op.drop_column('generation')
+    with op.batch_alter_table('table_statistics') as batch_op:
+        batch_op.drop_column('generation')
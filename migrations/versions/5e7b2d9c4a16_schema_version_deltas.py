@@ -0,0 +1,34 @@
+"""Delta-compressed schema versions
+
+Revision ID: 5e7b2d9c4a16
+Revises: c51e0a9f7d28
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7b2d9c4a16'
+down_revision = 'c51e0a9f7d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('schema_definitions') as batch_op:
+        batch_op.alter_column('structure', existing_type=sa.JSON(), nullable=True)
+        batch_op.add_column(sa.Column('delta', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('is_snapshot', sa.Boolean(), nullable=False, server_default=sa.true()))
+        batch_op.add_column(sa.Column('snapshot_distance', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    # Delta versions have no structure of their own and cannot be kept.
+    op.execute("DELETE FROM schema_definitions WHERE is_snapshot = 0")
+    with op.batch_alter_table('schema_definitions') as batch_op:
+        batch_op.drop_column('snapshot_distance')
+        batch_op.drop_column('is_snapshot')
+        batch_op.drop_column('delta')
+        batch_op.alter_column('structure', existing_type=sa.JSON(), nullable=False)
@@ -0,0 +1,24 @@
+"""Index lower(core_table.name) for the core entry picker
+
+Revision ID: 7d1f4c9a2e68
+Revises: 2c8a5f3e7b19
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1f4c9a2e68'
+down_revision = '2c8a5f3e7b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_core_table_name_lower', 'core_table', [sa.text('lower(name)')])
+
+
+def downgrade():
+    op.drop_index('ix_core_table_name_lower', table_name='core_table')
@@ -0,0 +1,48 @@
+"""Normalized user table grants
+
+Revision ID: 8d2f4b6a1c93
+Revises: 3a9c1e7d2b40
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b6a1c93'
+down_revision = '3a9c1e7d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_table_grants',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'table_name')
+    )
+    op.create_index('ix_user_table_grants_table_name', 'user_table_grants', ['table_name'])
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('permissions_version', sa.Integer(), nullable=False, server_default='0'))
+
+    # Copy the legacy comma-separated grants into the new table.
+    connection = op.get_bind()
+    grants = sa.table('user_table_grants', sa.column('user_id'), sa.column('table_name'))
+    rows = []
+    for user_id, accessible_tables in connection.execute(sa.text('SELECT id, accessible_tables FROM "user"')):
+        # Strip before de-duplicating so "a, a" yields a single grant.
+        table_names = {name.strip() for name in (accessible_tables or '').split(',') if name.strip()}
+        for table_name in sorted(table_names):
+            rows.append({'user_id': user_id, 'table_name': table_name})
+    if rows:
+        op.bulk_insert(grants, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('permissions_version')
+    op.drop_index('ix_user_table_grants_table_name', table_name='user_table_grants')
+    op.drop_table('user_table_grants')
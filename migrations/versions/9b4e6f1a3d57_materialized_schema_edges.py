@@ -0,0 +1,44 @@
+"""Materialized schema relationship edges
+
+Revision ID: 9b4e6f1a3d57
+Revises: 5e7b2d9c4a16
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e6f1a3d57'
+down_revision = '5e7b2d9c4a16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('table_relationships') as batch_op:
+        batch_op.add_column(sa.Column('schema_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('parent_name', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('child_name', sa.String(length=64), nullable=True))
+        batch_op.alter_column('parent_table_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('child_table_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key('fk_table_relationships_schema_id', 'schema_definitions', ['schema_id'], ['id'])
+        batch_op.create_index('ix_table_relationships_schema_id', ['schema_id'])
+        batch_op.create_index('ix_table_relationships_parent_name', ['parent_name'])
+        batch_op.create_index('ix_table_relationships_child_name', ['child_name'])
+    # Run `flask schema sync-edges` afterwards to materialize existing schemas.
+
+
+def downgrade():
+    op.execute("DELETE FROM table_relationships WHERE parent_table_id IS NULL OR child_table_id IS NULL")
+    with op.batch_alter_table('table_relationships') as batch_op:
+        batch_op.drop_index('ix_table_relationships_child_name')
+        batch_op.drop_index('ix_table_relationships_parent_name')
+        batch_op.drop_index('ix_table_relationships_schema_id')
+        batch_op.drop_constraint('fk_table_relationships_schema_id', type_='foreignkey')
+        batch_op.alter_column('child_table_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('parent_table_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('child_name')
+        batch_op.drop_column('parent_name')
+        batch_op.drop_column('schema_id')
@@ -0,0 +1,44 @@
+"""Table statistics
+
+Revision ID: c51e0a9f7d28
+Revises: 8d2f4b6a1c93
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51e0a9f7d28'
+down_revision = '8d2f4b6a1c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_statistics',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.Column('avg_row_bytes', sa.Integer(), nullable=False),
+    sa.Column('last_modified', sa.DateTime(), nullable=True),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+    # Existing dynamic tables need a row for the write paths to update.
+    connection = op.get_bind()
+    existing = set(sa.inspect(connection).get_table_names())
+    stats = sa.table('table_statistics', sa.column('table_name'), sa.column('row_count'), sa.column('avg_row_bytes'))
+    rows = []
+    for (table_name,) in connection.execute(sa.text('SELECT table_name FROM dynamic_tables')):
+        if table_name not in existing:
+            continue
+        row_count = connection.execute(sa.select(sa.func.count()).select_from(sa.table(table_name))).scalar()
+        rows.append({'table_name': table_name, 'row_count': row_count, 'avg_row_bytes': 0})
+    if rows:
+        op.bulk_insert(stats, rows)
+
+
+def downgrade():
+    op.drop_table('table_statistics')
@@ -0,0 +1,36 @@
+# File: tests/conftest.py
+
+import os
+import tempfile
+
+import pytest
+
+# config.Config reads DATABASE_URL at import time, so point it at a scratch
+# database before the app is imported.
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+
+from app import create_app, db
+import init_db
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        admin = init_db.create_admin_user()
+        init_db.create_core_entries()
+        init_db.ensure_dynamic_tables_exist(admin.id)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 302
+    return client
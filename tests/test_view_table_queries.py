@@ -0,0 +1,46 @@
+# File: tests/test_view_table_queries.py
+
+from sqlalchemy import event, text
+from app import db
+from app.models.core_cache import core_cache
+from app.models.query_cache import query_cache
+
+
+def _insert_employees(count):
+    uuids = db.session.execute(text('SELECT uuid FROM core_table ORDER BY id')).scalars().all()
+    for position in range(count):
+        db.session.execute(
+            text('INSERT INTO employees (name, core_uuid) VALUES (:name, :core_uuid)'),
+            {'name': f'employee {position}', 'core_uuid': uuids[position % len(uuids)]}
+        )
+    db.session.commit()
+
+
+def _count_queries(client, url):
+    # Start cold so both pages actually read rows and core records.
+    core_cache.clear()
+    query_cache.clear()
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return statements
+
+
+def test_view_table_query_count_does_not_grow_with_rows(client):
+    client.get('/view_table/employees')  # warm the user and permission caches
+
+    _insert_employees(1)
+    one_row = _count_queries(client, '/view_table/employees')
+
+    _insert_employees(24)
+    many_rows = _count_queries(client, '/view_table/employees')
+
+    assert len(many_rows) == len(one_row), many_rows